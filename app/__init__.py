@@ -15,14 +15,16 @@ def create_app(config_class=Config):
 
     from app.routes.auth import auth_bp
     from app.routes.views import views_bp
+    from app.routes.api import api_bp
+    from app.cli import db_upgrade_command, warm_metadata_command
+    from app.utils import profiling
 
     app.register_blueprint(auth_bp)
     app.register_blueprint(views_bp)
+    app.register_blueprint(api_bp)
+    app.cli.add_command(warm_metadata_command)
+    app.cli.add_command(db_upgrade_command)
+    profiling.init_app(app)
 
-    with app.app_context():
-        db.create_all()
-
+    # The schema is managed by ``flask db-upgrade`` (app/migrations.py).
     return app
-
-
-app = create_app()
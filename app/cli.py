@@ -0,0 +1,108 @@
+import time
+from collections import Counter
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy.orm import undefer
+
+from app.models import WrappedShare
+from app.utils.concurrency import parallel_map
+from app.utils.metadata_store import refresh_game_metadata
+from app.utils.steam_client import get_global_achievement_rarity
+from app.utils.upstream import UNAVAILABLE
+
+
+def _appids_from_shares():
+    """Appids ranked by how many stored Wrapped payloads feature them."""
+    counts = Counter()
+
+    for share in WrappedShare.query.options(undefer("*")):
+        payload = share.wrapped_payload
+        games = list(payload.get("top_5_games") or [])
+        if payload.get("top_game"):
+            games.append(payload["top_game"])
+
+        counts.update({game.get("appid") for game in games if game.get("appid")})
+
+    return [appid for appid, _ in counts.most_common()]
+
+
+def _appids_from_file(path):
+    appids = []
+
+    with open(path, encoding="utf-8") as handle:
+        for line in handle:
+            line = line.split("#", 1)[0].strip()
+            if line:
+                appids.append(int(line))
+
+    return appids
+
+
+@click.command("warm-metadata")
+@click.option(
+    "--from-shares/--no-from-shares",
+    default=True,
+    help="Include appids featured in stored Wrapped payloads.",
+)
+@click.option(
+    "--file",
+    "appid_file",
+    type=click.Path(exists=True, dir_okay=False),
+    help="File with one appid per line ('#' starts a comment).",
+)
+@click.option("--limit", default=500, show_default=True, help="Most appids to warm.")
+@click.option(
+    "--batch-size", default=4, show_default=True, help="Appids fetched concurrently."
+)
+@click.option(
+    "--rate",
+    default=2.0,
+    show_default=True,
+    help="Maximum appids started per second.",
+)
+@with_appcontext
+def warm_metadata_command(from_shares, appid_file, limit, batch_size, rate):
+    """Pre-populate store, SteamSpy and achievement-rarity data for popular games."""
+    appids = []
+    if appid_file:
+        appids.extend(_appids_from_file(appid_file))
+    if from_shares:
+        appids.extend(_appids_from_shares())
+
+    appids = list(dict.fromkeys(appids))[:limit]
+    if not appids:
+        click.echo("No appids to warm.")
+        return
+
+    warmed = 0
+    for start in range(0, len(appids), batch_size):
+        batch = appids[start : start + batch_size]
+        started_at = time.monotonic()
+
+        written = refresh_game_metadata(batch)
+        parallel_map(get_global_achievement_rarity, batch, max_workers=batch_size)
+        stored = sum(details is not UNAVAILABLE for details in written.values())
+        warmed += stored
+
+        click.echo(f"[{start + len(batch)}/{len(appids)}] warmed {stored} apps")
+
+        # Space batches out so the whole run stays under ``rate`` apps/second.
+        remaining = len(batch) / rate - (time.monotonic() - started_at)
+        if remaining > 0:
+            time.sleep(remaining)
+
+    click.echo(f"Done: metadata stored for {warmed} of {len(appids)} apps.")
+
+
+@click.command("db-upgrade")
+@with_appcontext
+def db_upgrade_command():
+    """Create or update the database schema; run before starting the app."""
+    from app import migrations
+
+    applied = migrations.upgrade()
+
+    for name in applied:
+        click.echo(f"Applied {name}")
+    click.echo("Database is up to date." if not applied else "Done.")
@@ -1,3 +1,55 @@
+from datetime import datetime, timezone
+
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import inspect, text
+from sqlalchemy.dialects import postgresql, sqlite
 
 db = SQLAlchemy()
+
+
+def utcnow():
+    """Naive UTC, matching how the DateTime columns are stored."""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def upsert(model):
+    """An ``INSERT`` for ``model`` that supports ``on_conflict_do_update``.
+
+    Both production (PostgreSQL) and development (SQLite) dialects spell
+    it the same way.
+    """
+    if db.engine.dialect.name == "postgresql":
+        return postgresql.insert(model)
+    return sqlite.insert(model)
+
+
+def add_missing_columns(*models):
+    """Add model columns that an existing table predates.
+
+    ``db.create_all()`` only creates missing tables, so columns added to an
+    existing model are appended here with ``ALTER TABLE``. New columns must
+    be nullable or carry a ``server_default``.
+    """
+    inspector = inspect(db.engine)
+
+    for model in models:
+        table = model.__table__
+        if not inspector.has_table(table.name):
+            continue
+
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+
+        for column in table.columns:
+            if column.name in existing:
+                continue
+
+            column_type = column.type.compile(dialect=db.engine.dialect)
+            ddl = f'ALTER TABLE "{table.name}" ADD COLUMN "{column.name}" {column_type}'
+            if column.server_default is not None:
+                default = column.server_default.arg
+                if hasattr(default, "compile"):
+                    default = default.compile(dialect=db.engine.dialect)
+                ddl += f" DEFAULT {default}"
+
+            with db.engine.begin() as connection:
+                connection.execute(text(ddl))
@@ -0,0 +1,86 @@
+"""Schema changes, applied in order by ``flask db-upgrade``.
+
+Each step runs once per database and is recorded in ``schema_migrations``.
+A fresh database gets the whole current schema from the baseline, so later
+steps must tolerate finding their change already in place. New columns on
+an existing model only need a step calling ``add_missing_columns``.
+"""
+
+from contextlib import contextmanager
+
+from sqlalchemy import text
+
+from app.db import add_missing_columns, db
+from app.models import GameMetadata, SchemaMigration, User, WrappedShare
+
+
+def _baseline():
+    """The tables and columns create_app used to maintain at startup."""
+    db.create_all()
+    add_missing_columns(User, WrappedShare, GameMetadata)
+
+
+def _wrapped_lookup_index():
+    for index in WrappedShare.__table__.indexes:
+        index.create(db.engine, checkfirst=True)
+
+    # Superseded by the (steam_id, created_at) index.
+    with db.engine.begin() as connection:
+        connection.execute(text("DROP INDEX IF EXISTS ix_wrapped_steam_id"))
+
+
+def _snapshot_incomplete_flags():
+    add_missing_columns(WrappedShare)
+
+
+# pg_advisory_lock key held while migrating, so that instances or release
+# steps running at the same time apply each step once.
+MIGRATION_LOCK_ID = 0x57EA3D
+
+MIGRATIONS = (
+    (1, "baseline", _baseline),
+    (2, "wrapped_lookup_index", _wrapped_lookup_index),
+    (3, "snapshot_incomplete_flags", _snapshot_incomplete_flags),
+)
+
+
+def pending():
+    """The ``(version, name, migrate)`` steps not yet applied."""
+    SchemaMigration.__table__.create(db.engine, checkfirst=True)
+    applied = {version for (version,) in db.session.query(SchemaMigration.version)}
+
+    return [migration for migration in MIGRATIONS if migration[0] not in applied]
+
+
+@contextmanager
+def _migration_lock():
+    if db.engine.dialect.name != "postgresql":
+        yield
+        return
+
+    # Session-level, so it is held on this connection across the commits
+    # the steps make through db.session.
+    with db.engine.connect() as connection:
+        connection.execute(
+            text("SELECT pg_advisory_lock(:id)"), {"id": MIGRATION_LOCK_ID}
+        )
+        try:
+            yield
+        finally:
+            connection.execute(
+                text("SELECT pg_advisory_unlock(:id)"), {"id": MIGRATION_LOCK_ID}
+            )
+
+
+def upgrade():
+    """Apply every pending step in order; return the names applied."""
+    applied = []
+
+    with _migration_lock():
+        for version, name, migrate in pending():
+            migrate()
+            db.session.add(SchemaMigration(version=version, name=name))
+            db.session.commit()
+            applied.append(name)
+
+    return applied
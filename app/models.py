@@ -1,6 +1,7 @@
 from uuid import uuid4
 
 from app.db import db
+from app.utils import payloads
 
 
 class User(db.Model):
@@ -19,18 +20,112 @@ class User(db.Model):
 
 class WrappedShare(db.Model):
     __tablename__ = "wrapped"
+    # Serves the latest-entry lookup (steam_id, newest created_at first)
+    # done on every /dashboard and /wrapped request.
+    __table_args__ = (
+        db.Index("ix_wrapped_steam_id_created_at", "steam_id", "created_at"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     slug = db.Column(
         db.String(32), unique=True, nullable=False, default=lambda: uuid4().hex[:16]
     )
-    steam_id = db.Column(db.String(64), nullable=False, index=True)
+    steam_id = db.Column(db.String(64), nullable=False)
     user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=True)
-    payload = db.Column(db.JSON, nullable=False)
+    # Rows written before packed payloads keep the whole Wrapped context
+    # here; newer rows leave it empty. Read either through wrapped_payload.
+    payload = db.deferred(db.Column(db.JSON, nullable=False))
+    packed_payload = db.deferred(db.Column(db.LargeBinary))
     created_at = db.Column(db.DateTime, server_default=db.func.now())
 
+    # The latest Wrapped and dashboard contexts, reused until they go stale.
+    # Rows exist for every user who has generated a Wrapped; only those
+    # with ``is_public`` set are reachable through their share link. Rows
+    # that predate the column were all created by sharing, hence the
+    # server default.
+    payload_version = db.Column(db.Integer)
+    generated_at = db.Column(db.DateTime)
+    dashboard_payload = db.Column(db.JSON)
+    dashboard_generated_at = db.Column(db.DateTime)
+    # Built while some upstreams were unavailable: served, but as stale.
+    incomplete = db.Column(
+        db.Boolean, nullable=False, default=False, server_default=db.false()
+    )
+    dashboard_incomplete = db.Column(
+        db.Boolean, nullable=False, default=False, server_default=db.false()
+    )
+    is_public = db.Column(
+        db.Boolean, nullable=False, default=False, server_default=db.true()
+    )
+    # When this user's stats were folded into the population sketches; each
+    # user is counted once.
+    sampled_at = db.Column(db.DateTime)
+
     user = db.relationship("User", backref=db.backref("wrapped_shares", lazy=True))
 
+    @property
+    def wrapped_payload(self):
+        """The stored Wrapped context, loaded and decoded on access."""
+        if self.packed_payload is not None:
+            return payloads.unpack(self.packed_payload)
+        return self.payload or {}
+
     def regenerate_slug(self):
         self.slug = uuid4().hex[:16]
 
+
+class GameMetadata(db.Model):
+    __tablename__ = "game_metadata"
+
+    appid = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    name = db.Column(db.String(256))
+    developers = db.Column(db.JSON)
+    genres = db.Column(db.JSON)
+    spy_genre = db.Column(db.String(256))
+    spy_tags = db.Column(db.JSON)
+    owners = db.Column(db.String(64))
+    fetched_at = db.Column(db.DateTime, nullable=False, index=True)
+
+    def to_details(self):
+        """The subset of the store ``appdetails`` shape that Analytics reads."""
+        details = {
+            "name": self.name,
+            "genre": self.spy_genre or "",
+            "tags": self.spy_tags or {},
+        }
+
+        if self.developers is not None:
+            details["developers"] = self.developers
+        if self.genres is not None:
+            details["genres"] = [{"description": genre} for genre in self.genres]
+        if self.owners:
+            details["owners"] = self.owners
+
+        return details
+
+    def __repr__(self):
+        return f"<GameMetadata {self.appid} {self.name}>"
+
+
+class PopulationBucket(db.Model):
+    """One bucket of a streaming histogram over every sampled profile.
+
+    See app.utils.population; rows are only ever incremented.
+    """
+
+    __tablename__ = "population_buckets"
+
+    metric = db.Column(db.String(32), primary_key=True)
+    bucket = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    count = db.Column(db.Integer, nullable=False, default=0)
+    total = db.Column(db.Float, nullable=False, default=0)
+
+
+class SchemaMigration(db.Model):
+    """One applied step of app.migrations."""
+
+    __tablename__ = "schema_migrations"
+
+    version = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    name = db.Column(db.String(128), nullable=False)
+    applied_at = db.Column(db.DateTime, server_default=db.func.now())
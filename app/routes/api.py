@@ -0,0 +1,120 @@
+import gzip
+import hashlib
+
+from flask import Blueprint, jsonify, request, session, url_for
+from sqlalchemy.orm import undefer
+
+from app.models import WrappedShare
+from app.routes.views import (
+    generate_wrapped,
+    load_dashboard_context,
+    load_wrapped_context,
+)
+from app.utils import jobs
+from app.utils.serializers import (
+    DASHBOARD_FIELDS,
+    WRAPPED_FIELDS,
+    parse_fields,
+    serialize,
+)
+
+api_bp = Blueprint("api", __name__, url_prefix="/api/v1")
+
+GZIP_MIN_SIZE = 512
+GZIP_LEVEL = 6
+
+
+def _error(message, status):
+    return jsonify({"error": message}), status
+
+
+def _payload_response(context, schema, public=False):
+    try:
+        fields = parse_fields(request.args.get("fields"), schema)
+    except ValueError as e:
+        return _error(str(e), 400)
+
+    response = jsonify(serialize(context, schema, fields))
+    response.set_etag(hashlib.sha1(response.get_data()).hexdigest())
+
+    if public:
+        response.cache_control.public = True
+        response.cache_control.max_age = 60
+    else:
+        response.cache_control.private = True
+        response.cache_control.no_cache = True
+
+    return response.make_conditional(request)
+
+
+@api_bp.after_request
+def compress(response):
+    response.vary.add("Accept-Encoding")
+
+    if (
+        response.status_code != 200
+        or response.direct_passthrough
+        or "Content-Encoding" in response.headers
+        or "gzip" not in request.accept_encodings
+    ):
+        return response
+
+    data = response.get_data()
+    if len(data) < GZIP_MIN_SIZE:
+        return response
+
+    response.set_data(gzip.compress(data, compresslevel=GZIP_LEVEL))
+    response.headers["Content-Encoding"] = "gzip"
+
+    # The body differs per encoding, so the validator can only be weak.
+    etag, _ = response.get_etag()
+    if etag:
+        response.set_etag(etag, weak=True)
+
+    return response
+
+
+@api_bp.route("/wrapped")
+def wrapped():
+    if "steam_id" not in session:
+        return _error("unauthorized", 401)
+
+    steam_id = session["steam_id"]
+    context, _ = load_wrapped_context(steam_id)
+
+    if not context:
+        state = jobs.get_job(steam_id) or jobs.start_wrapped_job(
+            steam_id, generate_wrapped
+        )
+        status = jobs.describe(state)
+        status["status_url"] = url_for("views.generating_status")
+        return jsonify(status), 202
+
+    return _payload_response(context, WRAPPED_FIELDS)
+
+
+@api_bp.route("/dashboard")
+def dashboard():
+    if "steam_id" not in session:
+        return _error("unauthorized", 401)
+
+    context, _ = load_dashboard_context(session["steam_id"])
+
+    if not context:
+        return _error("Error fetching profile", 500)
+
+    return _payload_response(context, DASHBOARD_FIELDS)
+
+
+@api_bp.route("/wrapped/shared/<slug>")
+def shared_wrapped(slug):
+    share_entry = (
+        WrappedShare.query.filter_by(slug=slug, is_public=True)
+        .options(undefer(WrappedShare.packed_payload))
+        .first()
+    )
+
+    if share_entry is None:
+        return _error("not found", 404)
+
+    return _payload_response(share_entry.wrapped_payload, WRAPPED_FIELDS, public=True)
@@ -1,6 +1,6 @@
 import re
-import requests
-from app.db import db
+from urllib.parse import urlencode
+from app.db import db, upsert
 from flask import (
     Blueprint,
     request,
@@ -10,6 +10,7 @@ from flask import (
 )
 
 from app.models import User
+from app.utils import http
 from app.utils.steam_client import get_user_summary
 
 auth_bp = Blueprint("auth", __name__)
@@ -27,7 +28,7 @@ def login():
         "openid.identity": "http://specs.openid.net/auth/2.0/identifier_select",
         "openid.claimed_id": "http://specs.openid.net/auth/2.0/identifier_select",
     }
-    query_string = requests.compat.urlencode(params)
+    query_string = urlencode(params)
     auth_url = f"{STEAM_OPENID_URL}?{query_string}"
 
     return redirect(auth_url)
@@ -38,7 +39,13 @@ def authorize():
     params = request.args.copy()
     params["openid.mode"] = "check_authentication"
 
-    response = requests.post(STEAM_OPENID_URL, data=params)
+    try:
+        # Login must keep working while badge scraping trips the
+        # steamcommunity.com circuit or exhausts its rate limit.
+        response = http.post(STEAM_OPENID_URL, data=params, upstream="steam-openid")
+    except Exception as e:
+        print(f"Error verifying login: {e}")
+        return "Login Failed", 502
 
     if "is_valid:true" in response.text:
         steam_id = re.search(
@@ -50,14 +57,18 @@ def authorize():
             user_summary = get_user_summary(steam_id)
 
             if user_summary:
-                user = User.query.filter_by(steam_id=steam_id).first()
-
-                if not user:
-                    user = User(steam_id=steam_id)
-                    db.session.add(user)
-
-                user.username = user_summary.get("personaname")
-                user.avatar_url = user_summary.get("avatarfull")
+                profile = {
+                    "username": user_summary.get("personaname"),
+                    "avatar_url": user_summary.get("avatarfull"),
+                }
+                # One statement, so concurrent logins can't race to insert.
+                statement = upsert(User).values(steam_id=steam_id, **profile)
+                db.session.execute(
+                    statement.on_conflict_do_update(
+                        index_elements=["steam_id"],
+                        set_={**profile, "last_updated": db.func.now()},
+                    )
+                )
                 db.session.commit()
 
         except Exception as e:
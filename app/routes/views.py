@@ -1,31 +1,66 @@
-from flask import Blueprint, render_template, session, redirect, url_for, request
-
-from app.utils.steam_client import (
-    get_user_summary,
-    get_friends_list,
-    get_owned_games,
-    get_recent_games,
-    get_badges,
-    get_steam_level,
+import hashlib
+
+from flask import (
+    Blueprint,
+    abort,
+    jsonify,
+    make_response,
+    render_template,
+    session,
+    redirect,
+    url_for,
+    request,
 )
+from markupsafe import Markup
+from sqlalchemy.orm import undefer
+
+from app import cache
+from app.utils import jobs
+from app.utils.profile_loader import load_profile
 from app.utils.analytics import Analytics
+from app.utils.snapshots import (
+    EXPIRED,
+    SHARE_PAGE_TIMEOUT,
+    STALE,
+    freshness,
+    get_share_entry,
+    refresh_in_background,
+    save_snapshot,
+    share_page_key,
+)
 from app.db import db
-from app.models import User, WrappedShare
+from app.models import WrappedShare
 
 views_bp = Blueprint("views", __name__)
 
 
-def build_wrapped_context(steam_id):
-    user = get_user_summary(steam_id)
-    friends = get_friends_list(steam_id)
-    games = get_owned_games(steam_id)
-    recent = get_recent_games(steam_id)
-    badges = get_badges(steam_id)
+def _no_progress(stage):
+    pass
+
+
+def build_wrapped_context(steam_id, progress=_no_progress, warm_dashboard=False):
+    """Build the /wrapped template context.
+
+    ``progress(stage)`` is called as each of ``jobs.STAGES`` completes. With
+    ``warm_dashboard`` the achievement and AI stages are also run so their
+    caches are hot by the time the user opens /dashboard.
+    """
+    profile = load_profile(steam_id, include_level=warm_dashboard, progress=progress)
+    user = profile.user
 
     if not user:
         return None
 
-    analytics = Analytics(user, games, friends, badges, recent, steam_id)
+    analytics = Analytics.from_profile(profile)
+
+    analytics.game_details
+    progress("store")
+
+    if warm_dashboard:
+        analytics.achievements
+        progress("achievements")
+        analytics.get_playstyle_personality()
+        progress("ai")
 
     genre_data = analytics.get_genre_breakdown()
     top_genre = list(genre_data.keys())[0] if genre_data else "Unknown"
@@ -37,12 +72,11 @@ def build_wrapped_context(steam_id):
     stats = analytics.get_dashboard_stats()
     energy_data = analytics.get_gaming_energy_score()
     top_games_five = analytics.get_top_games(5)
-    top_game = top_games_five[0] if top_games_five else None
 
     return {
         "user": user,
         "stats": stats,
-        "top_game": top_game,
+        "top_game": analytics.top_game,
         "top_5_games": top_games_five,
         "top_developers": top_devs,
         "top_genre": top_genre,
@@ -51,64 +85,40 @@ def build_wrapped_context(steam_id):
         "sleep_destroyer": analytics.get_sleep_destroyer(),
         "analogies": analytics.get_funny_analogies(),
         "genre_breakdown": genre_data,
+        "unavailable": sorted(analytics.unavailable),
     }
 
 
-@views_bp.route("/")
-def index():
-    if "steam_id" in session:
-        return redirect(url_for("views.dashboard"))
-    return render_template("index.html")
+def generate_wrapped(steam_id, progress=_no_progress):
+    """Background-job entry point: build the Wrapped and store its snapshot."""
+    context = build_wrapped_context(steam_id, progress, warm_dashboard=True)
 
+    if context:
+        entry = save_snapshot(steam_id, "wrapped", context)
 
-@views_bp.route("/generating")
-def generating():
-    if "steam_id" not in session:
-        return redirect(url_for("views.index"))
-    return render_template("generating.html")
+        # Everything the dashboard needs is cached by now.
+        dashboard_context = build_dashboard_context(steam_id)
+        if dashboard_context:
+            save_snapshot(steam_id, "dashboard", dashboard_context, entry)
 
+    return context
 
-@views_bp.route("/dashboard")
-def dashboard():
-    if "steam_id" not in session:
-        return redirect(url_for("views.index"))
-
-    steam_id = session["steam_id"]
-
-    user = get_user_summary(steam_id)
-    friends = get_friends_list(steam_id)
-    games = get_owned_games(steam_id)
-    recent = get_recent_games(steam_id)
-    badges = get_badges(steam_id)
-    level = get_steam_level(steam_id)
-
-    if isinstance(level, dict) and "player_level" in level:
-        level = level["player_level"]
-    elif level is None:
-        level = 0
 
-    if not user:
-        return "Error fetching profile", 500
-
-    analytics = Analytics(user, games, friends, badges, recent, steam_id)
+def _dashboard_shell(profile, analytics):
+    """Dashboard context that needs nothing beyond the profile itself."""
+    recent = profile.recent
     stats = analytics.get_dashboard_stats()
-    stats["level"] = level
+    stats["level"] = profile.level
 
     timeline_data = analytics.get_playtime_timeline()
-    top_devs = analytics.get_top_developers()
-    genre_data = analytics.get_genre_breakdown()
     energy_data = analytics.get_gaming_energy_score()
 
-    context = {
-        "user": user,
-        "friends": friends,
+    return {
+        "user": profile.user,
         "stats": stats,
         "recent": recent.get("games", [])[:8] if recent else [],
         "top_games": analytics.get_top_games(5),
-        "top_game": analytics.get_top_games(1)[0]
-        if analytics.get_top_games(1)
-        else None,
-        "personality": analytics.get_playstyle_personality(),
+        "top_game": analytics.top_game,
         "timeline": timeline_data.get("data", []),
         "timeline_stats": {
             "most_active_month": timeline_data.get("most_active", {}).get(
@@ -118,54 +128,216 @@ def dashboard():
                 "month", "N/A"
             ),
         },
-        "genre_breakdown": genre_data,
-        "top_developers": top_devs,
-        "achievement_stats": analytics.get_achievement_stats(),
-        "achievement_score": analytics.get_achievement_score(),
         "energy_score": energy_data.get("score", 0),
         "energy_percentile": energy_data.get("percentile", 50),
         "global_comparison": analytics.get_global_comparison(),
         "games_categorized": analytics.get_games_categorized(),
-        "badges": badges if badges else [],
         "sleep_destroyer": analytics.get_sleep_destroyer(),
     }
 
-    share_entry = (
-        WrappedShare.query.filter_by(steam_id=steam_id)
-        .order_by(WrappedShare.created_at.desc())
-        .first()
-    )
-    share_url = (
-        url_for("views.view_wrapped_share", slug=share_entry.slug, _external=True)
-        if share_entry
-        else None
-    )
 
-    return render_template("dashboard.html", **context, share_url=share_url)
+def _personality_section(analytics):
+    return {"personality": analytics.get_playstyle_personality()}
 
 
-@views_bp.route("/wrapped")
-def wrapped():
+def _achievements_section(analytics):
+    return {
+        "achievement_stats": analytics.get_achievement_stats(),
+        "achievement_score": analytics.get_achievement_score(),
+    }
+
+
+def _developers_section(analytics):
+    return {"top_developers": analytics.get_top_developers()}
+
+
+def _genres_section(analytics):
+    return {"genre_breakdown": analytics.get_genre_breakdown()}
+
+
+def _badges_section(analytics):
+    return {"badges": analytics.get_badges()}
+
+
+def _friends_section(analytics):
+    return {"friends_panel": analytics.get_friends_panel()}
+
+
+# Dashboard sections that wait on Gemini, achievements, store metadata,
+# badge pages or friend summaries.
+# Each maps to its context builder and the template parts it renders.
+DASHBOARD_SECTIONS = {
+    "personality": (_personality_section, ("personality",)),
+    "achievements": (
+        _achievements_section,
+        ("rarest_achievement", "achievement_score"),
+    ),
+    "developers": (_developers_section, ("developers",)),
+    "genres": (_genres_section, ("genres",)),
+    "badges": (_badges_section, ("badges",)),
+    "friends": (_friends_section, ("friends",)),
+}
+
+
+def build_dashboard_context(steam_id, sections=True):
+    """Build the /dashboard context; without ``sections`` only the shell."""
+    profile = load_profile(steam_id, include_level=True)
+
+    if not profile.user:
+        return None
+
+    analytics = Analytics.from_profile(profile)
+    context = _dashboard_shell(profile, analytics)
+
+    if sections:
+        for build_section, _ in DASHBOARD_SECTIONS.values():
+            context.update(build_section(analytics))
+
+    context["unavailable"] = sorted(analytics.unavailable)
+    return context
+
+
+def _share_url(share_entry):
+    if share_entry is None or not share_entry.is_public:
+        return None
+
+    return url_for("views.view_wrapped_share", slug=share_entry.slug, _external=True)
+
+
+@views_bp.route("/")
+def index():
+    if "steam_id" in session:
+        return redirect(url_for("views.dashboard"))
+    return render_template("index.html")
+
+
+@views_bp.route("/generating")
+def generating():
     if "steam_id" not in session:
         return redirect(url_for("views.index"))
 
     steam_id = session["steam_id"]
-    context = build_wrapped_context(steam_id)
+
+    if freshness(get_share_entry(steam_id), "wrapped") != EXPIRED:
+        return redirect(url_for("views.wrapped"))
+
+    jobs.start_wrapped_job(steam_id, generate_wrapped)
+
+    return render_template("generating.html")
+
+
+@views_bp.route("/generating/status")
+def generating_status():
+    if "steam_id" not in session:
+        return jsonify({"status": "unauthorized"}), 401
+
+    steam_id = session["steam_id"]
+    state = jobs.get_job(steam_id) or jobs.start_wrapped_job(steam_id, generate_wrapped)
+    status = jobs.describe(state)
+
+    if status["status"] == "done":
+        status["redirect"] = url_for("views.wrapped")
+
+    return jsonify(status)
+
+
+def load_dashboard_context(steam_id, shell=False):
+    """Return ``(context, share_entry)`` from the snapshot, rebuilding it if expired.
+
+    With ``shell`` an expired snapshot is rebuilt in the background instead;
+    only the shell context is returned and the page loads
+    ``DASHBOARD_SECTIONS`` separately.
+    """
+    share_entry = get_share_entry(steam_id)
+    state = freshness(share_entry, "dashboard")
+
+    if state == EXPIRED and shell:
+        context = build_dashboard_context(steam_id, sections=False)
+        if context:
+            # The next visit, and this page's section requests once it is
+            # saved, read the snapshot instead of building their parts again.
+            refresh_in_background(steam_id, "dashboard", build_dashboard_context)
+        return context, share_entry
+
+    if state == EXPIRED:
+        context = build_dashboard_context(steam_id)
+
+        if not context:
+            return None, share_entry
+
+        return context, save_snapshot(steam_id, "dashboard", context, share_entry)
+
+    if state == STALE:
+        refresh_in_background(steam_id, "dashboard", build_dashboard_context)
+
+    return share_entry.dashboard_payload, share_entry
+
+
+def load_wrapped_context(steam_id):
+    """Return ``(context, share_entry)``; ``context`` is None until generated."""
+    share_entry = get_share_entry(steam_id)
+    state = freshness(share_entry, "wrapped")
+
+    if state == EXPIRED:
+        return jobs.get_result(steam_id), share_entry
+
+    if state == STALE:
+        refresh_in_background(steam_id, "wrapped", build_wrapped_context)
+
+    return share_entry.wrapped_payload, share_entry
+
+
+@views_bp.route("/dashboard")
+def dashboard():
+    if "steam_id" not in session:
+        return redirect(url_for("views.index"))
+
+    context, share_entry = load_dashboard_context(session["steam_id"], shell=True)
 
     if not context:
-        return "Unable to generate wrapped summary", 500
+        return "Error fetching profile", 500
 
-    share_entry = (
-        WrappedShare.query.filter_by(steam_id=steam_id)
-        .order_by(WrappedShare.created_at.desc())
-        .first()
-    )
-    share_url = (
-        url_for("views.view_wrapped_share", slug=share_entry.slug, _external=True)
-        if share_entry
-        else None
+    return render_template(
+        "dashboard.html", **context, share_url=_share_url(share_entry)
     )
 
+
+@views_bp.route("/dashboard/sections/<name>")
+def dashboard_section(name):
+    if "steam_id" not in session:
+        return "Unauthorized", 401
+
+    if name not in DASHBOARD_SECTIONS:
+        abort(404)
+
+    steam_id = session["steam_id"]
+    build_section, parts = DASHBOARD_SECTIONS[name]
+    share_entry = get_share_entry(steam_id)
+
+    if freshness(share_entry, "dashboard") != EXPIRED:
+        context = share_entry.dashboard_payload
+    else:
+        profile = load_profile(steam_id)
+
+        if not profile.user:
+            return "Error fetching profile", 500
+
+        context = build_section(Analytics.from_profile(profile))
+
+    return render_template("components/dashboard/section.html", **context, parts=parts)
+
+
+@views_bp.route("/wrapped")
+def wrapped():
+    if "steam_id" not in session:
+        return redirect(url_for("views.index"))
+
+    context, share_entry = load_wrapped_context(session["steam_id"])
+
+    if not context:
+        return redirect(url_for("views.generating"))
+
+    share_url = _share_url(share_entry)
     auto_copy = request.args.get("copied") == "1" and bool(share_url)
 
     return render_template(
@@ -183,40 +355,72 @@ def create_wrapped_share():
         return redirect(url_for("views.index"))
 
     steam_id = session["steam_id"]
-    context = build_wrapped_context(steam_id)
+    share_entry = get_share_entry(steam_id)
 
-    if not context:
-        return "Unable to create shareable Wrapped", 500
+    if freshness(share_entry, "wrapped") == EXPIRED:
+        context = jobs.get_result(steam_id) or build_wrapped_context(steam_id)
 
-    share_entry = (
-        WrappedShare.query.filter_by(steam_id=steam_id)
-        .order_by(WrappedShare.created_at.desc())
-        .first()
-    )
+        if not context:
+            return "Unable to create shareable Wrapped", 500
 
-    if share_entry:
-        share_entry.payload = context
-    else:
-        user = User.query.filter_by(steam_id=steam_id).first()
-        share_entry = WrappedShare(steam_id=steam_id, user=user, payload=context)
-        db.session.add(share_entry)
+        share_entry = save_snapshot(steam_id, "wrapped", context, share_entry)
 
+    share_entry.is_public = True
     db.session.commit()
 
     return redirect(url_for("views.wrapped", copied=1))
 
 
-@views_bp.route("/wrapped/shared/<slug>")
-def view_wrapped_share(slug):
-    share_entry = WrappedShare.query.filter_by(slug=slug).first_or_404()
-    payload = share_entry.payload or {}
-
-    share_url = url_for("views.view_wrapped_share", slug=slug, _external=True)
+def _render_share_body(slug):
+    """The shared Wrapped itself, which is the same for every viewer.
 
-    return render_template(
-        "share.html",
-        **payload,
-        can_share=False,
-        share_url=share_url,
+    The layout around it (the navbar follows the viewer's login) is
+    rendered per request.
+    """
+    share_entry = (
+        WrappedShare.query.filter_by(slug=slug, is_public=True)
+        .options(undefer(WrappedShare.packed_payload))
+        .first_or_404()
+    )
+    html = render_template(
+        "components/share/wrapped.html",
+        **share_entry.wrapped_payload,
         shared_at=share_entry.created_at,
     )
+
+    return {
+        "html": html,
+        "etag": hashlib.sha1(html.encode("utf-8")).hexdigest(),
+        "last_modified": share_entry.generated_at or share_entry.created_at,
+    }
+
+
+@views_bp.route("/wrapped/shared/<slug>")
+def view_wrapped_share(slug):
+    key = share_page_key(slug)
+    body = cache.get(key)
+
+    if body is None:
+        body = _render_share_body(slug)
+        cache.set(key, body, timeout=SHARE_PAGE_TIMEOUT)
+
+    logged_in = bool(session.get("steam_id"))
+    response = make_response(
+        render_template(
+            "share.html",
+            wrapped_html=Markup(body["html"]),
+            can_share=False,
+            share_url=url_for("views.view_wrapped_share", slug=slug, _external=True),
+        )
+    )
+    response.set_etag(f"{body['etag']}-{'in' if logged_in else 'out'}")
+    response.last_modified = body["last_modified"]
+    # Anonymous viewers all get the same page, so shared caches may keep it.
+    if logged_in:
+        response.cache_control.private = True
+    else:
+        response.cache_control.public = True
+    response.cache_control.max_age = 60
+    response.vary.add("Cookie")
+
+    return response.make_conditional(request)
@@ -1,10 +1,104 @@
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from functools import cached_property
+import hashlib
+import json
 import re
+import threading
 from flask import current_app
-import google.generativeai as genai
-from collections import Counter, defaultdict
+from collections import Counter
+
+from app import cache
+from app.utils.concurrency import gather, submit
+from app.utils.library import GameLibrary
+from app.utils import population
+from app.utils.metadata_store import get_game_metadata
+from app.utils.profiling import traced
+from app.utils.steam_client import (
+    describe_badges,
+    get_achievement_schema,
+    get_global_achievement_rarity,
+    get_player_achievements,
+    get_user_summaries,
+    merge_achievements,
+)
+from app.utils.upstream import UNAVAILABLE
+
+# Store metadata and achievements are only ever read for the most-played
+# slice of the library.
+DETAILS_TOP_N = 10
+ACHIEVEMENTS_TOP_N = 5
+TOP_GAMES_N = max(DETAILS_TOP_N, ACHIEVEMENTS_TOP_N)
+
+FRIENDS_PANEL_N = 12
+FRIEND_FIELDS = ("steamid", "personaname", "avatarmedium", "profileurl", "personastate")
+
+PERSONALITY_TIMEOUT = 86400 * 30
+# Seconds a request waits for Gemini before falling back to the default.
+PERSONALITY_BUDGET = 6
+# Gemini calls are abandoned after this, freeing their _ai_executor thread;
+# a little past the budget so a slightly late answer is still cached.
+PERSONALITY_REQUEST_TIMEOUT = PERSONALITY_BUDGET + 4
+PERSONALITY_HOURS_BUCKET = 100
+
+FALLBACK_PERSONALITY = {
+    "title": "The Classic Gamer",
+    "desc": "You love games, and that's what matters.",
+    "emoji": "🎮",
+}
+
+_ai_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="gemini")
+_model = None
+_model_lock = threading.Lock()
+
+
+def get_personality_model(api_key):
+    global _model
+    with _model_lock:
+        if _model is None:
+            # Loaded on first use: it roughly doubles the app's import time.
+            import google.generativeai as genai
+
+            genai.configure(api_key=api_key)
+            _model = genai.GenerativeModel("gemini-2.0-flash")
+    return _model
+
+
+def _parse_personality(text):
+    # Clean up potential introductory text
+    # Remove "Here is an analysis:" or similar prefixes
+    text = re.sub(
+        r"^.*?(Here's|Here is) an analysis:?\s*",
+        "",
+        text,
+        flags=re.IGNORECASE | re.DOTALL,
+    )
+
+    parts = text.split("|")
+    if len(parts) >= 3:
+        return {
+            "title": parts[0].strip(),
+            "desc": parts[1].strip(),
+            "emoji": parts[2].strip(),
+        }
+    elif len(parts) == 2:
+        return {
+            "title": parts[0].strip(),
+            "desc": parts[1].strip(),
+            "emoji": "🎮",
+        }
+    else:
+        return {"title": "The Gamer", "desc": text, "emoji": "🎮"}
+
+
+@traced("gemini")
+def _generate_personality(api_key, prompt, cache_key):
+    response = get_personality_model(api_key).generate_content(
+        prompt, request_options={"timeout": PERSONALITY_REQUEST_TIMEOUT}
+    )
+    personality = _parse_personality(response.text.strip())
+    cache.set(cache_key, personality, timeout=PERSONALITY_TIMEOUT)
 
-from app.utils.steam_client import get_game_achievements, get_game_details
+    return personality
 
 
 class Analytics:
@@ -13,19 +107,96 @@ class Analytics:
     ):
         self.user = user_summary
         self.games = owned_games.get("games", []) if owned_games else []
+        self.library = GameLibrary(self.games)
         self.friends = friends
         self.badges = badges if badges else []
         self.recent = recent_games.get("games", []) if recent_games else []
         self.steam_id = steam_id
-        self.total_playtime_minutes = sum(
-            g.get("playtime_forever", 0) for g in self.games
-        )
+        self.total_playtime_minutes = self.library.total_playtime_minutes
         self.total_playtime_hours = self.total_playtime_minutes / 60
 
-        self.top_games = sorted(
-            self.games, key=lambda x: x.get("playtime_forever", 0), reverse=True
+        # Upstream resources that could not be fetched, so results built
+        # from this instance are incomplete.
+        self.unavailable = {
+            name
+            for name, value in (
+                ("user", user_summary),
+                ("games", owned_games),
+                ("friends", friends),
+                ("badges", badges),
+                ("recent", recent_games),
+            )
+            if value is UNAVAILABLE
+        }
+
+    @classmethod
+    def from_profile(cls, profile):
+        return cls(
+            profile.user,
+            profile.games,
+            profile.friends,
+            profile.badges,
+            profile.recent,
+            profile.steam_id,
         )
 
+    @cached_property
+    def top_games(self):
+        """The most-played games, as many as any section reads."""
+        return self.library.top(TOP_GAMES_N)
+
+    @cached_property
+    def game_details(self):
+        """Store metadata for the top games, looked up in one bulk query."""
+        appids = [game.get("appid") for game in self.top_games[:DETAILS_TOP_N]]
+        details = get_game_metadata(appids)
+
+        if UNAVAILABLE in details.values():
+            self.unavailable.add("store")
+
+        return details
+
+    @cached_property
+    def achievements(self):
+        """Achievement lists for the top games, loaded once per instance."""
+        appids = [game.get("appid") for game in self.top_games[:ACHIEVEMENTS_TOP_N]]
+
+        # Schema and rarity are cached per app and shared by every player;
+        # only the unlock state is per user. All of it arrives in one wave.
+        calls = {}
+        for appid in appids:
+            calls["player", appid] = (get_player_achievements, self.steam_id, appid)
+            calls["schema", appid] = (get_achievement_schema, appid)
+            calls["rarity", appid] = (get_global_achievement_rarity, appid)
+        results = gather(calls)
+
+        if UNAVAILABLE in results.values():
+            self.unavailable.add("achievements")
+
+        return {
+            appid: merge_achievements(
+                results["schema", appid],
+                results["player", appid],
+                results["rarity", appid],
+            )
+            for appid in appids
+        }
+
+    @cached_property
+    def top_game(self):
+        return self.top_games[0] if self.top_games else None
+
+    @cached_property
+    def personality_fingerprint(self):
+        """Stable hash of everything the personality prompt depends on."""
+        profile = {
+            "top": [g.get("name") for g in self.top_games[:5]],
+            "recent": [g.get("name") for g in self.recent[:5]],
+            "hours": int(self.total_playtime_hours) // PERSONALITY_HOURS_BUCKET,
+        }
+        encoded = json.dumps(profile, sort_keys=True).encode("utf-8")
+        return hashlib.sha1(encoded).hexdigest()
+
     def get_playstyle_personality(self):
         api_key = current_app.config.get("GOOGLE_API_KEY")
         if not api_key:
@@ -35,8 +206,10 @@ class Analytics:
                 "emoji": "🎮",
             }
 
-        genai.configure(api_key=api_key)
-        model = genai.GenerativeModel("gemini-2.0-flash")
+        cache_key = f"personality:{self.personality_fingerprint}"
+        personality = cache.get(cache_key)
+        if personality:
+            return personality
 
         top_5_names = [g.get("name") for g in self.top_games[:5]]
         recent_names = [g.get("name") for g in self.recent[:5]]
@@ -64,51 +237,23 @@ class Analytics:
         STRICTLY follow the format. Do NOT include any introductory text like "Here is an analysis".
         """
 
+        # The call keeps running past the budget and still fills the cache,
+        # so a slow answer is served on the next load instead of being lost.
+        future = submit(_ai_executor, _generate_personality, api_key, prompt, cache_key)
+
         try:
-            response = model.generate_content(prompt)
-            text = response.text.strip()
-            
-            # Clean up potential introductory text
-            # Remove "Here is an analysis:" or similar prefixes
-            text = re.sub(r"^.*?(Here's|Here is) an analysis:?\s*", "", text, flags=re.IGNORECASE | re.DOTALL)
-            
-            parts = text.split("|")
-            if len(parts) >= 3:
-                return {
-                    "title": parts[0].strip(),
-                    "desc": parts[1].strip(),
-                    "emoji": parts[2].strip(),
-                }
-            elif len(parts) == 2:
-                return {
-                    "title": parts[0].strip(),
-                    "desc": parts[1].strip(),
-                    "emoji": "🎮",
-                }
-            else:
-                return {"title": "The Gamer", "desc": text, "emoji": "🎮"}
+            return future.result(timeout=PERSONALITY_BUDGET)
+
+        except TimeoutError:
+            print(f"AI Error: no response within {PERSONALITY_BUDGET}s")
+            return dict(FALLBACK_PERSONALITY)
 
         except Exception as e:
             print(f"AI Error: {e}")
-            return {
-                "title": "The Classic Gamer",
-                "desc": "You love games, and that's what matters.",
-                "emoji": "🎮",
-            }
+            return dict(FALLBACK_PERSONALITY)
 
     def get_playtime_timeline(self):
-        timeline = defaultdict(int)
-
-        for game in self.games:
-            last_played = game.get("rtime_last_played", 0)
-
-            if last_played > 0:
-                dt = datetime.fromtimestamp(last_played)
-                key = dt.strftime("%Y-%m")
-
-                timeline[key] += game.get("playtime_forever", 0) / 60
-
-        sorted_timeline = sorted(timeline.items())
+        sorted_timeline = sorted(self.library.monthly_hours().items())
 
         if sorted_timeline:
             max_month = max(sorted_timeline, key=lambda x: x[1])
@@ -124,13 +269,15 @@ class Analytics:
         }
 
     def get_top_games(self, limit=5):
-        return self.top_games[:limit]
+        if limit <= TOP_GAMES_N:
+            return self.top_games[:limit]
+        return self.library.top(limit)
 
     def get_top_developers(self):
         developers = {}
 
-        for game in self.top_games[:10]:
-            details = get_game_details(game.get("appid"))
+        for game in self.top_games[:DETAILS_TOP_N]:
+            details = self.game_details.get(game.get("appid"))
             playtime = game.get("playtime_forever", 0) / 60
 
             if details and "developers" in details:
@@ -148,8 +295,8 @@ class Analytics:
 
     def get_genre_breakdown(self):
         genres = Counter()
-        for game in self.top_games[:10]:
-            details = get_game_details(game.get("appid"))
+        for game in self.top_games[:DETAILS_TOP_N]:
+            details = self.game_details.get(game.get("appid"))
 
             if details and "genres" in details:
                 for g in details["genres"]:
@@ -173,7 +320,9 @@ class Analytics:
         badges_score = len(self.badges) * 25
 
         score = int(hours_score + games_score + badges_score)
-        percentile = min(99, max(1, int((score / 10000) * 100)))
+        # Until enough profiles are sampled, a 10,000 score is the top.
+        percentile = population.percentile("energy_score", score, score / 100)
+        percentile = min(99, max(1, int(percentile)))
 
         return {"score": score, "percentile": percentile}
 
@@ -186,8 +335,8 @@ class Analytics:
         rare_count = 0
         ultra_rare_count = 0
 
-        for game in self.top_games[:5]:
-            achievements = get_game_achievements(self.steam_id, game.get("appid"))
+        for game in self.top_games[:ACHIEVEMENTS_TOP_N]:
+            achievements = self.achievements.get(game.get("appid"))
 
             if achievements:
                 unlocked_achs = [a for a in achievements if a["achieved"]]
@@ -210,8 +359,7 @@ class Analytics:
                         rarest = game_rarest
                         top_game_name = game.get("name")
 
-        top_game = self.top_games[0]
-        achievements = get_game_achievements(self.steam_id, top_game.get("appid"))
+        achievements = self.achievements.get(self.top_game.get("appid"))
         total = len(achievements) if achievements else 0
         unlocked = (
             len([a for a in achievements if a["achieved"]]) if achievements else 0
@@ -235,8 +383,8 @@ class Analytics:
         zero_achievement_games = 0
         best_game = {"name": "N/A", "rate": 0}
 
-        for game in self.top_games[:5]:
-            achievements = get_game_achievements(self.steam_id, game.get("appid"))
+        for game in self.top_games[:ACHIEVEMENTS_TOP_N]:
+            achievements = self.achievements.get(game.get("appid"))
             if achievements:
                 game_total = len(achievements)
                 game_unlocked = len([a for a in achievements if a["achieved"]])
@@ -257,38 +405,44 @@ class Analytics:
             if total_achievements > 0
             else 0
         )
+        rate_percentile = population.percentile(
+            "achievement_rate", completion_rate, completion_rate
+        )
 
         return {
             "total_unlocked": total_unlocked,
+            "total_achievements": total_achievements,
             "completion_rate": completion_rate,
             "perfect_games": perfect_games,
             "zero_games": zero_achievement_games,
             "best_game": best_game,
-            "rank_percentile": max(1, 100 - completion_rate),
+            "rank_percentile": max(1, int(100 - rate_percentile)),
         }
 
     def get_global_comparison(self):
-        never_played = len([g for g in self.games if g.get("playtime_forever", 0) == 0])
+        never_played = self.library.never_played
 
+        # Population means, with the old fixed figures until enough profiles
+        # have been sampled.
         return {
             "hours": {
                 "you": int(self.total_playtime_hours),
-                "avg": 350,
+                "avg": round(population.mean("hours", 350)),
+            },
+            "games": {
+                "you": len(self.games),
+                "avg": round(population.mean("games", 24)),
             },
-            "games": {"you": len(self.games), "avg": 24},
-            "rare_achievements": {
-                "you": "0.4%",
-                "avg": "2.1%",
+            "never_played": {
+                "you": never_played,
+                "avg": round(population.mean("never_played", 12)),
             },
-            "never_played": {"you": never_played, "avg": 12},
         }
 
     def get_sleep_destroyer(self):
         days_lost = self.total_playtime_hours / 8
-        played_games = len([g for g in self.games if g.get("playtime_forever", 0) > 0])
-        unplayed_games = len(
-            [g for g in self.games if g.get("playtime_forever", 0) == 0]
-        )
+        played_games = self.library.played
+        unplayed_games = self.library.never_played
 
         return {
             "days_lost": int(days_lost),
@@ -307,40 +461,54 @@ class Analytics:
             f"You could have cooked {int(self.total_playtime_hours / 2)} homemade meals.",
         ]
 
-    def get_games_categorized(self):
-        played = []
-        completed = []
-        abandoned = []
-        never_touched = []
-
-        for game in self.games:
-            playtime = game.get("playtime_forever", 0)
-            if playtime == 0:
-                never_touched.append(game)
-            elif playtime > 600:
-                completed.append(game)
-            elif playtime > 60:
-                played.append(game)
-            else:
-                abandoned.append(game)
+    def get_badges(self):
+        """The badges to show, with their names and icons."""
+        badges, complete = describe_badges(self.steam_id, self.badges)
+
+        if not complete:
+            self.unavailable.add("badges")
+
+        return badges
+
+    def get_friends_panel(self):
+        """Friend count, how many are online, and the first few to show.
+
+        Every friend's summary is resolved so online ones can be listed first.
+        """
+        friends = (self.friends or {}).get("friends", [])
+        summaries = get_user_summaries([friend["steamid"] for friend in friends])
+
+        players = sorted(
+            summaries.values(),
+            key=lambda p: (
+                not p.get("personastate"),
+                (p.get("personaname") or "").lower(),
+            ),
+        )
 
         return {
-            "played": len(played),
-            "completed": len(completed),
-            "abandoned": len(abandoned),
-            "never_touched": len(never_touched),
+            "count": len(friends),
+            "online": sum(1 for player in players if player.get("personastate")),
+            "friends": [
+                {field: player.get(field) for field in FRIEND_FIELDS}
+                for player in players[:FRIENDS_PANEL_N]
+            ],
+        }
+
+    def get_games_categorized(self):
+        return {
+            "played": self.library.over_an_hour,
+            "completed": self.library.over_ten_hours,
+            "abandoned": self.library.barely_played,
+            "never_touched": self.library.never_played,
         }
 
     def get_dashboard_stats(self):
         return {
             "total_playtime_hours": int(self.total_playtime_hours),
             "game_count": len(self.games),
-            "pile_of_shame": len(
-                [g for g in self.games if g.get("playtime_forever", 0) < 60]
-            ),
-            "never_played": len(
-                [g for g in self.games if g.get("playtime_forever", 0) == 0]
-            ),
+            "pile_of_shame": self.library.under_an_hour,
+            "never_played": self.library.never_played,
             "level": 0,
             "xp": 0,
         }
@@ -0,0 +1,232 @@
+import pickle
+import threading
+from collections import OrderedDict
+from time import time
+
+from flask_caching.backends.base import BaseCache
+from werkzeug.utils import import_string
+
+
+class LRUCache(BaseCache):
+    """Bounded in-process cache with least-recently-used eviction.
+
+    Values are kept pickled so callers never share (and mutate) the same
+    object, matching the semantics of the out-of-process backends. Both the
+    number of entries and their total pickled size are bounded; expired
+    entries are swept out on writes, not only when read again.
+    """
+
+    def __init__(
+        self,
+        max_entries=1024,
+        max_bytes=64 * 1024 * 1024,
+        sweep_interval=5,
+        default_timeout=300,
+        **kwargs,
+    ):
+        super().__init__(default_timeout=default_timeout, **kwargs)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.sweep_interval = sweep_interval
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._next_sweep = 0
+        self._lock = threading.Lock()
+
+    def _expires_at(self, timeout):
+        timeout = self._normalize_timeout(timeout)
+        return time() + timeout if timeout > 0 else 0
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= len(entry[1])
+        return entry
+
+    def _sweep(self, now):
+        expired = [
+            key
+            for key, (expires_at, _) in self._entries.items()
+            if expires_at and expires_at <= now
+        ]
+        for key in expired:
+            self._remove(key)
+        self._next_sweep = now + self.sweep_interval
+
+    def _live_entry(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        expires_at, data = entry
+        if expires_at and expires_at <= time():
+            self._remove(key)
+            return None
+
+        self._entries.move_to_end(key)
+        return data
+
+    def get(self, key):
+        with self._lock:
+            data = self._live_entry(key)
+        return pickle.loads(data) if data is not None else None
+
+    def set(self, key, value, timeout=None):
+        data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        if len(data) > self.max_bytes:
+            # Never worth evicting everything else for.
+            self.delete(key)
+            return False
+
+        with self._lock:
+            now = time()
+            if now >= self._next_sweep:
+                self._sweep(now)
+
+            self._remove(key)
+            self._entries[key] = (self._expires_at(timeout), data)
+            self._bytes += len(data)
+
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+
+        return True
+
+    def add(self, key, value, timeout=None):
+        with self._lock:
+            if self._live_entry(key) is not None:
+                return False
+        return self.set(key, value, timeout)
+
+    def delete(self, key):
+        with self._lock:
+            return self._remove(key) is not None
+
+    def has(self, key):
+        with self._lock:
+            return self._live_entry(key) is not None
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+        return True
+
+    @classmethod
+    def factory(cls, app, config, args, kwargs):
+        kwargs["max_entries"] = config.get("CACHE_LOCAL_MAX_ENTRIES", 1024)
+        kwargs["max_bytes"] = config.get("CACHE_LOCAL_MAX_BYTES", 64 * 1024 * 1024)
+        return cls(*args, **kwargs)
+
+
+class TieredCache(BaseCache):
+    """A per-process ``LRUCache`` in front of a cache shared by all workers.
+
+    Reads are served locally when possible and fall through to the shared
+    tier, whose hits are copied into the local tier. Local entries live for
+    at most ``local_timeout`` seconds so writes from other workers (and
+    ``cache.memoize`` version bumps) become visible quickly. Keys starting
+    with one of ``shared_only_prefixes`` skip the local tier entirely, for
+    state that other workers must see immediately.
+    """
+
+    def __init__(
+        self, local, shared, local_timeout=60, shared_only_prefixes=(), **kwargs
+    ):
+        super().__init__(**kwargs)
+        self.local = local
+        self.shared = shared
+        self.local_timeout = local_timeout
+        self.shared_only_prefixes = tuple(shared_only_prefixes)
+
+    def _is_local(self, key):
+        return not key.startswith(self.shared_only_prefixes)
+
+    def _local_timeout(self, timeout):
+        timeout = self._normalize_timeout(timeout)
+        return min(timeout, self.local_timeout) if timeout > 0 else self.local_timeout
+
+    def get(self, key):
+        if not self._is_local(key):
+            return self.shared.get(key)
+
+        value = self.local.get(key)
+        if value is not None:
+            return value
+
+        value = self.shared.get(key)
+        if value is not None:
+            self.local.set(key, value, self.local_timeout)
+        return value
+
+    def set(self, key, value, timeout=None):
+        result = self.shared.set(key, value, timeout)
+        if self._is_local(key):
+            self.local.set(key, value, self._local_timeout(timeout))
+        return result
+
+    def get_many(self, *keys):
+        values = {key: self.local.get(key) for key in keys if self._is_local(key)}
+        missing = [key for key in dict.fromkeys(keys) if values.get(key) is None]
+
+        # One round trip (MGET on Redis) for everything the local tier lacks.
+        if missing:
+            for key, value in zip(missing, self.shared.get_many(*missing)):
+                values[key] = value
+                if value is not None and self._is_local(key):
+                    self.local.set(key, value, self.local_timeout)
+
+        return [values[key] for key in keys]
+
+    def set_many(self, mapping, timeout=None):
+        result = self.shared.set_many(mapping, timeout)
+        local_timeout = self._local_timeout(timeout)
+
+        for key, value in mapping.items():
+            if self._is_local(key):
+                self.local.set(key, value, local_timeout)
+
+        return result
+
+    def add(self, key, value, timeout=None):
+        added = self.shared.add(key, value, timeout)
+        if added and self._is_local(key):
+            self.local.set(key, value, self._local_timeout(timeout))
+        return added
+
+    def delete(self, key):
+        self.local.delete(key)
+        return self.shared.delete(key)
+
+    def has(self, key):
+        return self.local.has(key) or self.shared.has(key)
+
+    def clear(self):
+        self.local.clear()
+        return self.shared.clear()
+
+    def inc(self, key, delta=1):
+        self.local.delete(key)
+        return self.shared.inc(key, delta)
+
+    def dec(self, key, delta=1):
+        self.local.delete(key)
+        return self.shared.dec(key, delta)
+
+    @classmethod
+    def factory(cls, app, config, args, kwargs):
+        shared_type = config.get("CACHE_SHARED_TYPE", "FileSystemCache")
+        if "." not in shared_type:
+            shared_type = "flask_caching.backends." + shared_type
+
+        shared = import_string(shared_type).factory(app, config, [], dict(kwargs))
+        local = LRUCache.factory(app, config, [], dict(kwargs))
+
+        return cls(
+            local,
+            shared,
+            local_timeout=config.get("CACHE_LOCAL_TIMEOUT", 60),
+            shared_only_prefixes=config.get("CACHE_SHARED_ONLY_PREFIXES", ()),
+            **kwargs,
+        )
@@ -0,0 +1,70 @@
+import threading
+import time
+
+# Consecutive failed calls (connection errors, timeouts, 5xx after retries)
+# that open a host's circuit, and how long it then stays open.
+FAILURE_THRESHOLD = 5
+COOLDOWN = 30
+
+_circuits = {}
+_lock = threading.Lock()
+
+
+class CircuitOpen(Exception):
+    """``host`` failed repeatedly and is not being called until it cools down."""
+
+    def __init__(self, host, retry_in):
+        super().__init__(f"Circuit for {host} is open, retrying in {retry_in:.1f}s")
+        self.host = host
+        self.retry_in = retry_in
+
+
+class _Circuit:
+    def __init__(self):
+        self.failures = 0
+        self.open_until = 0.0
+
+
+def _circuit(host):
+    circuit = _circuits.get(host)
+    if circuit is None:
+        circuit = _circuits[host] = _Circuit()
+    return circuit
+
+
+def check(host):
+    """Raise CircuitOpen unless a call to ``host`` may go ahead.
+
+    Once the cooldown has passed a single call is let through as a probe;
+    everyone else keeps failing fast until it succeeds, or for another
+    cooldown if it never reports back.
+    """
+    now = time.monotonic()
+
+    with _lock:
+        circuit = _circuit(host)
+
+        if circuit.failures < FAILURE_THRESHOLD:
+            return
+
+        if now < circuit.open_until:
+            raise CircuitOpen(host, circuit.open_until - now)
+
+        circuit.open_until = now + COOLDOWN
+
+
+def success(host):
+    with _lock:
+        circuit = _circuit(host)
+        circuit.failures = 0
+
+
+def failure(host):
+    with _lock:
+        circuit = _circuit(host)
+        circuit.failures += 1
+
+        if circuit.failures >= FAILURE_THRESHOLD:
+            circuit.open_until = time.monotonic() + COOLDOWN
+            if circuit.failures == FAILURE_THRESHOLD:
+                print(f"Opening circuit for {host} for {COOLDOWN}s")
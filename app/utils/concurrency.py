@@ -0,0 +1,82 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextvars import copy_context
+from functools import partial
+
+from flask import current_app
+
+
+def _call_in_app_context(app, fn, *args, **kwargs):
+    with app.app_context():
+        return fn(*args, **kwargs)
+
+
+def submit(executor, fn, *args, **kwargs):
+    """Submit ``fn`` to ``executor`` so it runs inside the current app's context.
+
+    The caller's context variables are copied too, so calls made by ``fn``
+    are profiled against the request that started it.
+    """
+    app = current_app._get_current_object()
+    return executor.submit(
+        copy_context().run, _call_in_app_context, app, fn, *args, **kwargs
+    )
+
+
+def _prime_memoize_version(fn):
+    """Create a memoized function's cache version key up front.
+
+    ``cache.memoize`` lazily writes a random version key on first use; when
+    several threads race on a cold key, each writes its own version and all
+    but the last thread's results become unreachable.
+    """
+    if isinstance(fn, partial):
+        fn = fn.func
+
+    make_cache_key = getattr(fn, "make_cache_key", None)
+    if make_cache_key:
+        make_cache_key(fn.uncached)
+
+
+def gather(calls, max_workers=8, on_complete=None):
+    """Run ``{name: (fn, *args)}`` concurrently and return ``{name: result}``.
+
+    Every call runs inside its own app context, with a copy of the caller's
+    context variables, so ``cache.memoize``, ``current_app`` and profiling
+    keep working from worker threads. ``on_complete(name)`` is called from
+    the caller's thread as each call finishes.
+    """
+    if not calls:
+        return {}
+
+    app = current_app._get_current_object()
+
+    primed = set()
+    for call in calls.values():
+        if call[0] not in primed:
+            _prime_memoize_version(call[0])
+            primed.add(call[0])
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(calls))) as pool:
+        futures = {
+            pool.submit(
+                copy_context().run, _call_in_app_context, app, call[0], *call[1:]
+            ): name
+            for name, call in calls.items()
+        }
+        results = {}
+
+        for future in as_completed(futures):
+            name = futures[future]
+            results[name] = future.result()
+            if on_complete:
+                on_complete(name)
+
+        return results
+
+
+def parallel_map(fn, items, max_workers=8):
+    items = list(items)
+    results = gather(
+        {index: (fn, item) for index, item in enumerate(items)}, max_workers
+    )
+    return [results[index] for index in range(len(items))]
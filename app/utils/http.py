@@ -0,0 +1,186 @@
+import os
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from app.utils import circuit_breaker, rate_limit
+from app.utils.profiling import record
+
+# (connect, read) in seconds; applied to every call that does not pass its own.
+DEFAULT_TIMEOUT = (3.05, 10)
+
+# Maximum in-flight requests per upstream host, per process. The store and
+# SteamSpy throttle aggressively, the Web API is comparatively generous.
+HOST_LIMITS = {
+    "api.steampowered.com": 8,
+    "store.steampowered.com": 4,
+    "steamcommunity.com": 4,
+    "steamspy.com": 2,
+}
+DEFAULT_HOST_LIMIT = 4
+
+# Server errors are retried in place. 429s, and 503s carrying Retry-After,
+# are handled by request() instead, so that every worker backs off, not just
+# the one that was throttled, and the wait counts against the call's deadline.
+RETRY_STATUSES = (500, 502, 503, 504)
+THROTTLED_STATUSES = (429, 503)
+THROTTLED_ATTEMPTS = 3
+
+# Seconds a call may queue for a rate-limit slot before giving up.
+DEFAULT_MAX_WAIT = 10
+
+# Base URL (e.g. a local stub server) that every upstream request is sent to
+# instead, with the original host as the first path segment. Used by the
+# benchmarks; host limits and profiling still apply to the original host.
+UPSTREAM_OVERRIDE = os.environ.get("UPSTREAM_OVERRIDE")
+
+_sessions = {}
+_semaphores = {}
+_lock = threading.Lock()
+
+
+class _Retry(Retry):
+    """Leaves responses with ``Retry-After`` to request() instead of sleeping
+    for it here, while holding the host's semaphore."""
+
+    def is_retry(self, method, status_code, has_retry_after=False):
+        if has_retry_after and status_code in THROTTLED_STATUSES:
+            return False
+        return super().is_retry(method, status_code, has_retry_after)
+
+
+def _retry_policy():
+    return _Retry(
+        total=3,
+        connect=2,
+        read=1,
+        status=3,
+        backoff_factor=0.5,
+        backoff_jitter=0.5,
+        status_forcelist=RETRY_STATUSES,
+        respect_retry_after_header=False,
+        raise_on_status=False,
+    )
+
+
+def _host_state(host):
+    with _lock:
+        session = _sessions.get(host)
+
+        if session is None:
+            limit = HOST_LIMITS.get(host, DEFAULT_HOST_LIMIT)
+            adapter = HTTPAdapter(
+                pool_connections=1,
+                pool_maxsize=limit,
+                max_retries=_retry_policy(),
+            )
+            session = requests.Session()
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+
+            _sessions[host] = session
+            _semaphores[host] = threading.BoundedSemaphore(limit)
+
+        return session, _semaphores[host]
+
+
+def _override_url(url):
+    parts = urlsplit(url)
+    overridden = f"{UPSTREAM_OVERRIDE.rstrip('/')}/{parts.hostname}{parts.path}"
+
+    if parts.query:
+        overridden += f"?{parts.query}"
+
+    return overridden
+
+
+def _send(session, semaphore, host, upstream, method, url, **kwargs):
+    with semaphore:
+        start = time.perf_counter()
+        outcome = "error"
+        try:
+            response = session.request(method, url, **kwargs)
+            outcome = str(response.status_code)
+        except requests.RequestException:
+            circuit_breaker.failure(upstream)
+            raise
+        finally:
+            record("http", time.perf_counter() - start, outcome, host=host)
+
+    if response.status_code >= 500:
+        circuit_breaker.failure(upstream)
+    else:
+        circuit_breaker.success(upstream)
+
+    return response
+
+
+def _throttled(response):
+    if response.status_code == 429:
+        return True
+    return response.status_code == 503 and "Retry-After" in response.headers
+
+
+def request(method, url, max_wait=DEFAULT_MAX_WAIT, upstream=None, **kwargs):
+    """Send a request through the pooled, retrying session for ``url``'s host.
+
+    Calls first queue for a slot in the host's shared rate limit, for up to
+    ``max_wait`` seconds (``rate_limit.RateLimited`` after that). Responses
+    with a status in ``RETRY_STATUSES`` are retried with jittered
+    exponential backoff. A 429, or a 503 with ``Retry-After``, pauses the
+    host for every worker for that long and is then retried within the same
+    deadline.
+
+    After repeated connection errors or server errors the host's circuit
+    opens and calls raise ``circuit_breaker.CircuitOpen`` straight away.
+
+    ``upstream`` names the circuit and rate limit the call counts against,
+    the host by default, for calls that must not share them with the rest
+    of the host's traffic.
+    """
+    host = urlsplit(url).hostname or ""
+    upstream = upstream or host
+
+    try:
+        circuit_breaker.check(upstream)
+    except circuit_breaker.CircuitOpen:
+        record("http", 0, "circuit_open", host=host)
+        raise
+
+    session, semaphore = _host_state(host)
+    kwargs.setdefault("timeout", DEFAULT_TIMEOUT)
+    deadline = time.monotonic() + max_wait
+
+    if UPSTREAM_OVERRIDE:
+        url = _override_url(url)
+
+    for attempt in range(THROTTLED_ATTEMPTS):
+        queued_at = time.monotonic()
+        try:
+            waited = rate_limit.acquire(upstream, max(0, deadline - queued_at))
+        except rate_limit.RateLimited:
+            record("rate_limit_wait", time.monotonic() - queued_at, "timeout", host)
+            raise
+
+        if waited:
+            record("rate_limit_wait", waited, "ok", host)
+
+        response = _send(session, semaphore, host, upstream, method, url, **kwargs)
+
+        if not _throttled(response) or attempt == THROTTLED_ATTEMPTS - 1:
+            return response
+
+        rate_limit.block(upstream, rate_limit.retry_after(response))
+        response.close()
+
+
+def get(url, **kwargs):
+    return request("GET", url, **kwargs)
+
+
+def post(url, **kwargs):
+    return request("POST", url, **kwargs)
@@ -0,0 +1,120 @@
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import current_app
+
+from app import cache
+
+STAGES = (
+    ("profile", "Fetching your Steam profile..."),
+    ("library", "Loading your game library..."),
+    ("store", "Looking up developers and genres..."),
+    ("achievements", "Digging through your achievements..."),
+    ("ai", "Consulting the AI oracle..."),
+)
+
+JOB_TIMEOUT = 300
+RESULT_TIMEOUT = 900
+
+_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="wrapped-job")
+
+
+def _state_key(steam_id):
+    return f"wrapped-job:{steam_id}"
+
+
+def _result_key(steam_id):
+    return f"wrapped-result:{steam_id}"
+
+
+def get_job(steam_id):
+    return cache.get(_state_key(steam_id))
+
+
+def get_result(steam_id):
+    return cache.get(_result_key(steam_id))
+
+
+def _save(steam_id, state):
+    cache.set(_state_key(steam_id), state, timeout=JOB_TIMEOUT + RESULT_TIMEOUT)
+
+
+def _run(app, steam_id, build):
+    with app.app_context():
+        state = get_job(steam_id) or _new_state()
+
+        def progress(stage):
+            state["stages"][stage] = True
+            _save(steam_id, state)
+
+        try:
+            context = build(steam_id, progress=progress)
+
+            if context is None:
+                state["status"] = "error"
+                state["error"] = "Unable to generate wrapped summary"
+            else:
+                cache.set(_result_key(steam_id), context, timeout=RESULT_TIMEOUT)
+                state["status"] = "done"
+
+        except Exception as e:
+            traceback.print_exc()
+            print(f"Wrapped job failed for {steam_id}: {e}")
+            state["status"] = "error"
+            state["error"] = "Unable to generate wrapped summary"
+
+        state["finished_at"] = time.time()
+        _save(steam_id, state)
+
+
+def _new_state():
+    return {
+        "status": "running",
+        "stages": {key: False for key, _ in STAGES},
+        "error": None,
+        "started_at": time.time(),
+        "finished_at": None,
+    }
+
+
+def start_wrapped_job(steam_id, build, force=False):
+    """Queue ``build(steam_id, progress=...)`` on the background pool.
+
+    A job that is still running (or finished with a result that has not
+    expired) is reused rather than started again, so page reloads and
+    concurrent workers polling the same user do not duplicate the work.
+    """
+    state = get_job(steam_id)
+
+    if state and not force:
+        running = (
+            state["status"] == "running"
+            and time.time() - state["started_at"] < JOB_TIMEOUT
+        )
+        if running or (state["status"] == "done" and get_result(steam_id)):
+            return state
+
+    state = _new_state()
+    _save(steam_id, state)
+    _executor.submit(_run, current_app._get_current_object(), steam_id, build)
+
+    return state
+
+
+def describe(state):
+    """JSON-friendly view of a job state for the polling endpoint."""
+    stages = [
+        {"key": key, "label": label, "done": state["stages"].get(key, False)}
+        for key, label in STAGES
+    ]
+    done = sum(stage["done"] for stage in stages)
+    current = next((stage for stage in stages if not stage["done"]), None)
+
+    return {
+        "status": state["status"],
+        "stages": stages,
+        "progress": int(done / len(stages) * 100),
+        "message": current["label"] if current else "Generating your wrapped report...",
+        "error": state["error"],
+    }
@@ -0,0 +1,89 @@
+import heapq
+from array import array
+from collections import defaultdict
+from datetime import datetime
+from functools import cached_property
+
+
+class GameLibrary:
+    """Columnar view of an owned-games list with precomputed aggregates.
+
+    ``playtimes`` (minutes) and ``last_played`` (unix time) are parallel
+    ``array('q')`` columns indexed like ``games``; ``last_played`` is only
+    extracted when first read. The original dicts are kept for handing
+    whole games back to templates.
+    """
+
+    # Playtime thresholds (minutes) used by the library categories.
+    HOUR = 60
+    TEN_HOURS = 600
+
+    def __init__(self, games):
+        self.games = games
+
+        self.playtimes = array("q")
+        append = self.playtimes.append
+        hour, ten_hours = self.HOUR, self.TEN_HOURS
+        total = never_played = under_an_hour = over_an_hour = over_ten_hours = 0
+
+        # The column and every aggregate come out of one pass over the games.
+        for game in games:
+            minutes = game.get("playtime_forever", 0)
+            append(minutes)
+            total += minutes
+
+            if minutes < hour:
+                under_an_hour += 1
+                if not minutes:
+                    never_played += 1
+            elif minutes > ten_hours:
+                over_ten_hours += 1
+            elif minutes > hour:
+                over_an_hour += 1
+
+        self.total_playtime_minutes = total
+        self.never_played = never_played
+        self.under_an_hour = under_an_hour
+        self.over_an_hour = over_an_hour
+        self.over_ten_hours = over_ten_hours
+
+    @cached_property
+    def last_played(self):
+        return array("q", [game.get("rtime_last_played", 0) for game in self.games])
+
+    @property
+    def played(self):
+        return len(self.games) - self.never_played
+
+    @property
+    def barely_played(self):
+        """Games with some playtime, but no more than an hour of it."""
+        return (
+            len(self.games)
+            - self.never_played
+            - self.over_an_hour
+            - self.over_ten_hours
+        )
+
+    def top(self, limit):
+        """The ``limit`` most-played games, ordered like a stable sort.
+
+        ``heapq.nlargest`` keeps ties in their original order, so this equals
+        ``sorted(games, key=playtime, reverse=True)[:limit]`` without sorting
+        the whole library.
+        """
+        indices = heapq.nlargest(
+            limit, range(len(self.playtimes)), key=self.playtimes.__getitem__
+        )
+        return [self.games[index] for index in indices]
+
+    def monthly_hours(self):
+        """Hours of lifetime playtime bucketed by last-played month."""
+        months = defaultdict(int)
+
+        for last_played, playtime in zip(self.last_played, self.playtimes):
+            if last_played > 0:
+                key = datetime.fromtimestamp(last_played).strftime("%Y-%m")
+                months[key] += playtime / 60
+
+        return months
@@ -0,0 +1,173 @@
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from app import cache
+from app.db import db, upsert, utcnow
+from app.models import GameMetadata
+from app.utils.concurrency import parallel_map, submit
+from app.utils.steam_client import get_game_details
+from app.utils.upstream import NEGATIVE_TIMEOUT, UNAVAILABLE
+
+# Rows older than this are still served, but refreshed in the background.
+METADATA_MAX_AGE = timedelta(days=7)
+# Rows written while SteamSpy was unavailable go stale after this instead.
+PARTIAL_MAX_AGE = timedelta(hours=1)
+# Apps the store has no data for (delisted, region-locked...) have no row, so
+# that answer is cached instead; failed lookups for NEGATIVE_TIMEOUT.
+NO_DATA_TIMEOUT = 86400
+_NO_DATA = "no-data"
+
+_refresh_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="metadata")
+_refreshing = set()
+_refreshing_lock = threading.Lock()
+
+
+def _row_from_details(appid, details):
+    """Column values of the GameMetadata row for ``details``."""
+    genres = details.get("genres")
+    fetched_at = utcnow()
+
+    if details.get("spy_unavailable"):
+        fetched_at -= METADATA_MAX_AGE - PARTIAL_MAX_AGE
+
+    return {
+        "appid": appid,
+        "name": details.get("name"),
+        "developers": details.get("developers"),
+        "genres": [g["description"] for g in genres] if genres is not None else None,
+        "spy_genre": details.get("genre") or None,
+        "spy_tags": details.get("tags") or None,
+        "owners": details.get("owners") or None,
+        "fetched_at": fetched_at,
+    }
+
+
+def _upsert_rows(rows):
+    """Insert or overwrite ``rows`` in one statement, so a row another worker
+    inserted first is simply updated."""
+    statement = upsert(GameMetadata).values(rows)
+    db.session.execute(
+        statement.on_conflict_do_update(
+            index_elements=["appid"],
+            set_={
+                column: statement.excluded[column]
+                for column in rows[0]
+                if column != "appid"
+            },
+        )
+    )
+
+
+def _miss_key(appid):
+    return f"game-metadata-miss:{appid}"
+
+
+def _remember_misses(misses):
+    """Cache ``{appid: None or UNAVAILABLE}`` so missing rows aren't refetched
+    on every lookup."""
+    no_data = {_miss_key(a): _NO_DATA for a, d in misses.items() if d is None}
+    failed = {_miss_key(a): UNAVAILABLE for a, d in misses.items() if d is not None}
+
+    if no_data:
+        cache.set_many(no_data, timeout=NO_DATA_TIMEOUT)
+    if failed:
+        cache.set_many(failed, timeout=NEGATIVE_TIMEOUT)
+
+
+def _known_misses(appids):
+    """``{appid: None or UNAVAILABLE}`` for recently missed ``appids``."""
+    values = cache.get_many(*[_miss_key(appid) for appid in appids])
+
+    return {
+        appid: None if value == _NO_DATA else UNAVAILABLE
+        for appid, value in zip(appids, values)
+        if value is not None
+    }
+
+
+def refresh_game_metadata(appids):
+    """Fetch store and SteamSpy data for ``appids`` and upsert their rows.
+
+    Returns ``{appid: details}`` for the rows that were written and
+    ``{appid: UNAVAILABLE}`` for apps the store could not be reached for;
+    appids the store has no data for are skipped. Both kinds of miss are
+    cached briefly so get_game_metadata doesn't refetch them.
+    """
+    appids = list(dict.fromkeys(appids))
+    fetched = parallel_map(get_game_details, appids)
+
+    rows = []
+    written = {}
+    misses = {}
+    for appid, details in zip(appids, fetched):
+        if details is None:
+            misses[appid] = None
+            continue
+
+        if details is UNAVAILABLE:
+            written[appid] = misses[appid] = UNAVAILABLE
+            continue
+
+        row = _row_from_details(appid, details)
+        rows.append(row)
+        written[appid] = GameMetadata(**row).to_details()
+
+    if rows:
+        _upsert_rows(rows)
+        db.session.commit()
+
+    _remember_misses(misses)
+    return written
+
+
+def _refresh_in_background(appids):
+    try:
+        refresh_game_metadata(appids)
+    except Exception as e:
+        traceback.print_exc()
+        print(f"Metadata refresh failed for {len(appids)} apps: {e}")
+        db.session.rollback()
+    finally:
+        with _refreshing_lock:
+            _refreshing.difference_update(appids)
+
+
+def schedule_refresh(appids):
+    with _refreshing_lock:
+        appids = [appid for appid in appids if appid not in _refreshing]
+        _refreshing.update(appids)
+
+    if appids:
+        submit(_refresh_executor, _refresh_in_background, appids)
+
+
+def get_game_metadata(appids):
+    """Return ``{appid: details}`` for ``appids`` from the metadata table.
+
+    Missing appids are fetched in one parallel batch before returning; stale
+    ones are returned as they are and refreshed in the background. Apps the
+    store has no data for map to ``None``, ones it could not be reached for
+    to ``UNAVAILABLE``.
+    """
+    appids = [appid for appid in dict.fromkeys(appids) if appid is not None]
+    if not appids:
+        return {}
+
+    rows = GameMetadata.query.filter(GameMetadata.appid.in_(appids)).all()
+    found = {row.appid: row.to_details() for row in rows}
+
+    stale_before = utcnow() - METADATA_MAX_AGE
+    stale = [row.appid for row in rows if row.fetched_at < stale_before]
+    if stale:
+        schedule_refresh(stale)
+
+    missing = [appid for appid in appids if appid not in found]
+    if missing:
+        found.update(_known_misses(missing))
+        missing = [appid for appid in missing if appid not in found]
+    if missing:
+        found.update(refresh_game_metadata(missing))
+
+    return {appid: found.get(appid) for appid in appids}
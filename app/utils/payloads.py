@@ -0,0 +1,25 @@
+import json
+import zlib
+
+from app.utils.serializers import WRAPPED_FIELDS, serialize
+
+# Format of WrappedShare.packed_payload: zlib-compressed JSON of
+# ``{"v": PACKED_VERSION, "data": <context trimmed to WRAPPED_FIELDS>}``.
+# Version 1 is the untrimmed context in the older ``payload`` JSON column.
+PACKED_VERSION = 2
+
+
+def pack(context):
+    """Trim a Wrapped context to the rendered fields and compress it."""
+    document = {"v": PACKED_VERSION, "data": serialize(context, WRAPPED_FIELDS)}
+    encoded = json.dumps(document, separators=(",", ":")).encode("utf-8")
+    return zlib.compress(encoded)
+
+
+def unpack(packed):
+    document = json.loads(zlib.decompress(packed))
+
+    if document.get("v") != PACKED_VERSION:
+        raise ValueError(f"Unsupported Wrapped payload version {document.get('v')}")
+
+    return document["data"]
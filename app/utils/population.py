@@ -0,0 +1,115 @@
+import math
+from bisect import bisect_left
+
+from app import cache
+from app.db import db, upsert
+from app.models import PopulationBucket
+
+# Every metric is kept as a histogram whose buckets grow by GAMMA, so a
+# percentile is exact to within one bucket (~10% of the value) however many
+# profiles are folded in. Bucket 0 holds everything below 1. Histograms from
+# any number of workers merge by adding their counts.
+GAMMA = 1.1
+_LOG_GAMMA = math.log(GAMMA)
+
+# Until a metric has this many samples, callers get their defaults.
+MIN_SAMPLES = 20
+
+SKETCHES_KEY = "population-sketches"
+SKETCHES_TIMEOUT = 600
+
+
+def bucket_for(value):
+    if value < 1:
+        return 0
+    return 1 + int(math.log(value) / _LOG_GAMMA)
+
+
+def sample(context):
+    """The population metrics of one complete dashboard context."""
+    stats = context["stats"]
+    values = {
+        "hours": stats["total_playtime_hours"],
+        "games": stats["game_count"],
+        "never_played": stats["never_played"],
+        "energy_score": context["energy_score"],
+    }
+
+    achievement_score = context.get("achievement_score") or {}
+    if achievement_score.get("total_achievements"):
+        values["achievement_rate"] = achievement_score["completion_rate"]
+
+    return values
+
+
+def add_sample(values):
+    """Fold ``{metric: value}`` into the sketches, in the caller's transaction."""
+    for metric, value in values.items():
+        statement = upsert(PopulationBucket).values(
+            metric=metric, bucket=bucket_for(value), count=1, total=value
+        )
+        db.session.execute(
+            statement.on_conflict_do_update(
+                index_elements=["metric", "bucket"],
+                set_={
+                    "count": PopulationBucket.count + 1,
+                    "total": PopulationBucket.total + value,
+                },
+            )
+        )
+
+
+def _load_sketches():
+    sketches = {}
+    rows = PopulationBucket.query.order_by(
+        PopulationBucket.metric, PopulationBucket.bucket
+    )
+
+    for row in rows:
+        sketch = sketches.setdefault(
+            row.metric, {"buckets": [], "cumulative": [], "count": 0, "total": 0.0}
+        )
+        sketch["count"] += row.count
+        sketch["total"] += row.total
+        sketch["buckets"].append(row.bucket)
+        sketch["cumulative"].append(sketch["count"])
+
+    return sketches
+
+
+def _sketch(metric):
+    sketches = cache.get(SKETCHES_KEY)
+
+    if sketches is None:
+        sketches = _load_sketches()
+        cache.set(SKETCHES_KEY, sketches, timeout=SKETCHES_TIMEOUT)
+
+    sketch = sketches.get(metric)
+    if sketch is None or sketch["count"] < MIN_SAMPLES:
+        return None
+    return sketch
+
+
+def percentile(metric, value, default=None):
+    """Share of sampled profiles, 0-100, with a lower ``metric`` than ``value``."""
+    sketch = _sketch(metric)
+    if sketch is None:
+        return default
+
+    bucket = bucket_for(value)
+    buckets, cumulative = sketch["buckets"], sketch["cumulative"]
+    index = bisect_left(buckets, bucket)
+
+    below = cumulative[index - 1] if index else 0
+    same = 0
+    if index < len(buckets) and buckets[index] == bucket:
+        same = cumulative[index] - below
+
+    return 100 * (below + same / 2) / sketch["count"]
+
+
+def mean(metric, default=None):
+    sketch = _sketch(metric)
+    if sketch is None:
+        return default
+    return sketch["total"] / sketch["count"]
@@ -0,0 +1,75 @@
+from dataclasses import dataclass
+
+from app.utils.concurrency import gather
+from app.utils.steam_client import (
+    get_user_summary,
+    get_friends_list,
+    get_owned_games,
+    get_recent_games,
+    get_badges,
+    get_steam_level,
+)
+
+
+@dataclass(frozen=True)
+class SteamProfile:
+    steam_id: str
+    user: dict | None
+    friends: dict | None
+    games: dict | None
+    recent: dict | None
+    badges: list | None
+    level: int = 0
+
+
+def _normalize_level(level):
+    if isinstance(level, dict) and "player_level" in level:
+        return level["player_level"]
+    return level or 0
+
+
+# Which resources make up the "profile" and "library" progress stages.
+PROFILE_RESOURCES = ("user", "friends", "badges", "level")
+LIBRARY_RESOURCES = ("games", "recent")
+
+
+def load_profile(steam_id, include_level=False, progress=None):
+    """Fetch every per-user Steam resource concurrently.
+
+    Each getter keeps its own ``cache.memoize`` entry, so a warm profile
+    costs the same cache reads as before and a cold one costs roughly the
+    slowest single upstream call instead of their sum. ``progress(stage)``
+    is called once the "profile" and "library" resources have all arrived.
+    """
+    calls = {
+        "user": (get_user_summary, steam_id),
+        "friends": (get_friends_list, steam_id),
+        "games": (get_owned_games, steam_id),
+        "recent": (get_recent_games, steam_id),
+        "badges": (get_badges, steam_id),
+    }
+    if include_level:
+        calls["level"] = (get_steam_level, steam_id)
+
+    pending = set(calls)
+
+    def on_complete(name):
+        pending.discard(name)
+        for stage, resources in (
+            ("profile", PROFILE_RESOURCES),
+            ("library", LIBRARY_RESOURCES),
+        ):
+            if name in resources and not pending.intersection(resources):
+                progress(stage)
+
+    results = gather(calls, on_complete=on_complete if progress else None)
+
+    return SteamProfile(
+        steam_id=steam_id,
+        user=results["user"],
+        friends=results["friends"],
+        games=results["games"],
+        recent=results["recent"],
+        badges=results["badges"],
+        level=_normalize_level(results.get("level")),
+    )
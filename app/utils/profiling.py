@@ -0,0 +1,245 @@
+import json
+import logging
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from functools import update_wrapper, wraps
+
+from flask import Response, current_app, g, request
+
+from app import cache
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds, in seconds, of the latency histogram buckets.
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+# Spans recorded during the current request, or None outside of one.
+_spans = ContextVar("profiling_spans", default=None)
+# Set by a traced memoized function while its cache lookup is in progress;
+# the wrapped fetch marks it when the lookup missed.
+_misses = ContextVar("profiling_misses", default=None)
+
+_histograms = {}
+_histograms_lock = threading.Lock()
+
+
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(BUCKETS, value)] += 1
+        self.total += value
+        self.count += 1
+
+
+def observe(metric, labels, seconds):
+    key = (metric, tuple(sorted(labels.items())))
+
+    with _histograms_lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = Histogram()
+        histogram.observe(seconds)
+
+
+def record(name, seconds, outcome="ok", host=None):
+    """Record one upstream or cache call against the current request."""
+    labels = {"name": name, "outcome": outcome}
+    span_name = name
+    if host:
+        labels["host"] = host
+        span_name = f"{name}.{host}"
+    observe("upstream_call_duration_seconds", labels, seconds)
+
+    spans = _spans.get()
+    if spans is not None:
+        spans.append({"name": span_name, "ms": seconds * 1000, "outcome": outcome})
+
+
+def traced(name=None):
+    """Record the duration and success of every call to the function."""
+
+    def decorator(fn):
+        span_name = name or fn.__name__
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            outcome = "error"
+            try:
+                result = fn(*args, **kwargs)
+                outcome = "ok"
+                return result
+            finally:
+                record(span_name, time.perf_counter() - start, outcome)
+
+        return wrapper
+
+    return decorator
+
+
+def traced_memoize(timeout=None, **kwargs):
+    """``cache.memoize`` that records each call as a cache hit or miss.
+
+    The returned function keeps the memoized function's attributes
+    (``uncached``, ``make_cache_key``...) and its cache keys.
+    """
+
+    def decorator(fn):
+        @wraps(fn)
+        def fetch(*args, **kw):
+            misses = _misses.get()
+            if misses is not None:
+                misses.append(fn.__name__)
+            return fn(*args, **kw)
+
+        memoized = cache.memoize(timeout, **kwargs)(fetch)
+
+        def wrapper(*args, **kw):
+            misses = []
+            token = _misses.set(misses)
+            start = time.perf_counter()
+            outcome = "error"
+            try:
+                result = memoized(*args, **kw)
+                outcome = "miss" if misses else "hit"
+                return result
+            finally:
+                _misses.reset(token)
+                record(fn.__name__, time.perf_counter() - start, outcome)
+
+        return update_wrapper(wrapper, memoized)
+
+    return decorator
+
+
+def _summarize(spans):
+    summary = {}
+
+    for span in spans:
+        entry = summary.setdefault(span["name"], {"count": 0, "ms": 0.0})
+        entry["count"] += 1
+        entry["ms"] += span["ms"]
+        entry[span["outcome"]] = entry.get(span["outcome"], 0) + 1
+
+    return summary
+
+
+def _server_timing(summary, total_ms):
+    entries = []
+
+    for name, entry in summary.items():
+        outcomes = ", ".join(
+            f"{count} {key}"
+            for key, count in entry.items()
+            if key not in ("count", "ms")
+        )
+        entries.append(f'{name};desc="{outcomes}";dur={entry["ms"]:.1f}')
+
+    entries.append(f"total;dur={total_ms:.1f}")
+    return ", ".join(entries)
+
+
+def _start_request():
+    g.profiling_start = time.perf_counter()
+    g.profiling_token = _spans.set([])
+
+
+def _finish_request(response):
+    start = g.get("profiling_start")
+    if start is None:
+        return response
+
+    seconds = time.perf_counter() - start
+    summary = _summarize(_spans.get() or [])
+
+    observe(
+        "request_duration_seconds",
+        {"endpoint": request.endpoint or "none", "status": str(response.status_code)},
+        seconds,
+    )
+    if current_app.config["PROFILING_ENABLED"]:
+        response.headers["Server-Timing"] = _server_timing(summary, seconds * 1000)
+
+    logger.info(
+        json.dumps(
+            {
+                "event": "request",
+                "method": request.method,
+                "path": request.path,
+                "endpoint": request.endpoint,
+                "status": response.status_code,
+                "ms": round(seconds * 1000, 1),
+                "calls": {
+                    name: {**entry, "ms": round(entry["ms"], 1)}
+                    for name, entry in summary.items()
+                },
+            }
+        )
+    )
+
+    return response
+
+
+def _teardown_request(exc):
+    token = g.pop("profiling_token", None)
+    if token is not None:
+        _spans.reset(token)
+
+
+def _format_labels(labels, **extra):
+    pairs = [*labels, *extra.items()]
+    return ",".join(f'{key}="{value}"' for key, value in pairs)
+
+
+def render_metrics():
+    """All histograms in the Prometheus text exposition format."""
+    with _histograms_lock:
+        snapshot = {
+            key: (list(h.counts), h.total, h.count) for key, h in _histograms.items()
+        }
+
+    lines = []
+    seen = set()
+
+    for (metric, labels), (counts, total, count) in sorted(snapshot.items()):
+        if metric not in seen:
+            lines.append(f"# TYPE {metric} histogram")
+            seen.add(metric)
+
+        cumulative = 0
+        for bound, bucket_count in zip((*BUCKETS, "+Inf"), counts):
+            cumulative += bucket_count
+            lines.append(
+                f"{metric}_bucket{{{_format_labels(labels, le=bound)}}} {cumulative}"
+            )
+        lines.append(f"{metric}_sum{{{_format_labels(labels)}}} {total}")
+        lines.append(f"{metric}_count{{{_format_labels(labels)}}} {count}")
+
+    return "\n".join(lines) + "\n"
+
+
+def metrics():
+    return Response(render_metrics(), mimetype="text/plain; version=0.0.4")
+
+
+def init_app(app):
+    """Time and log every request.
+
+    With ``PROFILING_ENABLED`` set, also emit Server-Timing and serve /metrics.
+    """
+    if not logger.handlers:
+        logger.addHandler(logging.StreamHandler())
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+    app.teardown_request(_teardown_request)
+    if app.config.get("PROFILING_ENABLED"):
+        app.add_url_rule("/metrics", "metrics", metrics)
@@ -0,0 +1,150 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+# (tokens per second, bucket size) per upstream host, shared by every worker
+# on the machine. The Web API rate keeps a saturated day under the 100k
+# daily key quota; the store and SteamSpy throttle well before that.
+HOST_RATES = {
+    "api.steampowered.com": (1.1, 100),
+    "store.steampowered.com": (0.6, 20),
+    "steamspy.com": (1.0, 4),
+    "steamcommunity.com": (2.0, 20),
+}
+
+# Used when a 429 or 503 carries no usable Retry-After.
+DEFAULT_RETRY_AFTER = 10
+
+RATE_LIMIT_ENABLED = os.environ.get("RATE_LIMIT_ENABLED", "1") != "0"
+RATE_LIMIT_DB = os.environ.get("RATE_LIMIT_DB") or os.path.join(
+    tempfile.gettempdir(), "steam-wrapped-rate-limit.sqlite3"
+)
+
+_local = threading.local()
+
+
+class RateLimited(Exception):
+    """No token for ``host`` became available before the caller's deadline."""
+
+    def __init__(self, host, wait):
+        super().__init__(f"Rate limit for {host}: next slot in {wait:.1f}s")
+        self.host = host
+        self.wait = wait
+
+
+def _connection():
+    connection = getattr(_local, "connection", None)
+
+    if connection is None:
+        connection = sqlite3.connect(RATE_LIMIT_DB, timeout=5, isolation_level=None)
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS buckets ("
+            "host TEXT PRIMARY KEY, tokens REAL NOT NULL, "
+            "updated_at REAL NOT NULL, blocked_until REAL NOT NULL DEFAULT 0)"
+        )
+        _local.connection = connection
+
+    return connection
+
+
+def _take(host, rate, capacity):
+    """Take a token for ``host``; return 0, or the seconds until one is free."""
+    connection = _connection()
+    now = time.time()
+
+    connection.execute("BEGIN IMMEDIATE")
+    try:
+        row = connection.execute(
+            "SELECT tokens, updated_at, blocked_until FROM buckets WHERE host = ?",
+            (host,),
+        ).fetchone()
+        tokens, updated_at, blocked_until = row or (capacity, now, 0)
+
+        tokens = min(capacity, tokens + (now - updated_at) * rate)
+        if now < blocked_until:
+            wait = blocked_until - now
+        elif tokens >= 1:
+            tokens -= 1
+            wait = 0
+        else:
+            wait = (1 - tokens) / rate
+
+        connection.execute(
+            "INSERT OR REPLACE INTO buckets VALUES (?, ?, ?, ?)",
+            (host, tokens, now, blocked_until),
+        )
+        connection.execute("COMMIT")
+    except BaseException:
+        connection.execute("ROLLBACK")
+        raise
+
+    return wait
+
+
+def acquire(host, max_wait):
+    """Wait for a request slot for ``host``; return the seconds spent waiting.
+
+    Raises RateLimited when no slot frees up within ``max_wait`` seconds.
+    Hosts without a configured rate, or a broken store, never wait.
+    """
+    if not RATE_LIMIT_ENABLED or host not in HOST_RATES:
+        return 0
+
+    rate, capacity = HOST_RATES[host]
+    start = time.monotonic()
+    deadline = start + max_wait
+
+    while True:
+        try:
+            wait = _take(host, rate, capacity)
+        except sqlite3.Error as e:
+            print(f"Rate limiter unavailable, not throttling {host}: {e}")
+            return time.monotonic() - start
+
+        if not wait:
+            return time.monotonic() - start
+
+        remaining = deadline - time.monotonic()
+        if wait > remaining:
+            raise RateLimited(host, wait)
+
+        time.sleep(wait)
+
+
+def block(host, seconds):
+    """Hold every worker's requests to ``host`` for ``seconds``."""
+    if not RATE_LIMIT_ENABLED:
+        return
+
+    capacity = HOST_RATES.get(host, (0, 0))[1]
+    now = time.time()
+
+    try:
+        connection = _connection()
+        connection.execute(
+            "INSERT INTO buckets VALUES (?, ?, ?, ?) ON CONFLICT(host) DO UPDATE "
+            "SET blocked_until = MAX(blocked_until, excluded.blocked_until)",
+            (host, capacity, now, now + seconds),
+        )
+    except sqlite3.Error as e:
+        print(f"Rate limiter unavailable, cannot block {host}: {e}")
+
+
+def retry_after(response):
+    """Seconds a 429/503 response asks us to wait, from ``Retry-After``."""
+    value = response.headers.get("Retry-After")
+    if not value:
+        return DEFAULT_RETRY_AFTER
+
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return DEFAULT_RETRY_AFTER
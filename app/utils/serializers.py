@@ -0,0 +1,119 @@
+USER_FIELDS = ("steamid", "personaname", "avatarfull", "profileurl")
+GAME_FIELDS = ("appid", "name", "playtime_forever")
+RECENT_GAME_FIELDS = ("appid", "name", "playtime_2weeks", "playtime_forever")
+BADGE_FIELDS = ("name", "image")
+ACHIEVEMENT_FIELDS = ("display_name", "icon", "rarity")
+
+DASHBOARD_BADGES = 8
+
+
+def _pick(data, keys):
+    if not data:
+        return None
+    return {key: data.get(key) for key in keys}
+
+
+def _pick_each(items, keys):
+    return [_pick(item, keys) for item in items or []]
+
+
+def _same(value):
+    return value
+
+
+def _user(user):
+    return _pick(user, USER_FIELDS)
+
+
+def _game(game):
+    return _pick(game, GAME_FIELDS)
+
+
+def _games(games):
+    return _pick_each(games, GAME_FIELDS)
+
+
+def _recent(games):
+    return _pick_each(games, RECENT_GAME_FIELDS)
+
+
+def _badges(badges):
+    return _pick_each((badges or [])[:DASHBOARD_BADGES], BADGE_FIELDS)
+
+
+def _personality(personality):
+    if not personality:
+        return None
+    return {
+        "title": personality.get("title"),
+        "desc": personality.get("desc"),
+        "traits": personality.get("traits", []),
+    }
+
+
+def _achievement_stats(stats):
+    if not stats:
+        return None
+    return {
+        "total_unlocked": stats.get("total_unlocked", 0),
+        "rare_count": stats.get("rare_count", 0),
+        "ultra_rare_count": stats.get("ultra_rare_count", 0),
+        "top_game_name": stats.get("top_game_name"),
+        "rarest": _pick(stats.get("rarest"), ACHIEVEMENT_FIELDS),
+    }
+
+
+# Top-level fields the templates actually read, and how each is trimmed.
+WRAPPED_FIELDS = {
+    "user": _user,
+    "stats": _same,
+    "top_game": _game,
+    "top_5_games": _games,
+    "top_developers": _same,
+    "top_genre": _same,
+    "top_genre_hours": _same,
+    "genre_breakdown": _same,
+    "energy_score": _same,
+    "sleep_destroyer": _same,
+    "unavailable": _same,
+}
+
+DASHBOARD_FIELDS = {
+    "user": _user,
+    "stats": _same,
+    "recent": _recent,
+    "top_game": _game,
+    "personality": _personality,
+    "timeline": _same,
+    "timeline_stats": _same,
+    "genre_breakdown": _same,
+    "top_developers": _same,
+    "achievement_stats": _achievement_stats,
+    "energy_score": _same,
+    "energy_percentile": _same,
+    "global_comparison": _same,
+    "games_categorized": _same,
+    "badges": _badges,
+    "sleep_destroyer": _same,
+    "unavailable": _same,
+}
+
+
+def parse_fields(value, schema):
+    """Parse a comma-separated ``fields`` argument against ``schema``.
+
+    Returns None for "everything"; raises ValueError naming unknown fields.
+    """
+    if not value:
+        return None
+
+    fields = [field.strip() for field in value.split(",") if field.strip()]
+    unknown = [field for field in fields if field not in schema]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+
+    return fields
+
+
+def serialize(context, schema, fields=None):
+    return {field: schema[field](context.get(field)) for field in fields or schema}
@@ -0,0 +1,154 @@
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from app import cache
+from app.db import db, utcnow
+from app.models import User, WrappedShare
+from app.utils import payloads, population
+from app.utils.concurrency import submit
+
+# Bump whenever the shape of a stored Wrapped or dashboard context changes;
+# snapshots written under another version are ignored.
+SNAPSHOT_VERSION = 3
+
+# Served as-is while younger than FRESH_FOR; served and refreshed in the
+# background until SERVE_STALE_FOR; rebuilt before serving after that.
+FRESH_FOR = timedelta(hours=6)
+SERVE_STALE_FOR = timedelta(days=7)
+
+REFRESH_LOCK_TIMEOUT = 300
+
+# Rendered public share pages; dropped whenever the Wrapped payload changes.
+SHARE_PAGE_TIMEOUT = 86400
+
+_refresh_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="snapshot")
+
+FRESH = "fresh"
+STALE = "stale"
+EXPIRED = "expired"
+
+_GENERATED_COLUMNS = {
+    "wrapped": "generated_at",
+    "dashboard": "dashboard_generated_at",
+}
+_INCOMPLETE_COLUMNS = {
+    "wrapped": "incomplete",
+    "dashboard": "dashboard_incomplete",
+}
+
+
+def get_share_entry(steam_id):
+    return (
+        WrappedShare.query.filter_by(steam_id=steam_id)
+        .order_by(WrappedShare.created_at.desc())
+        .first()
+    )
+
+
+def freshness(entry, kind):
+    """How usable ``entry``'s ``kind`` snapshot is right now."""
+    if entry is None or entry.payload_version != SNAPSHOT_VERSION:
+        return EXPIRED
+
+    # Set together with the payload, so the payload itself (deferred for
+    # the Wrapped) need not be loaded.
+    generated_at = getattr(entry, _GENERATED_COLUMNS[kind])
+    if generated_at is None:
+        return EXPIRED
+
+    age = utcnow() - generated_at
+    if age < FRESH_FOR and not getattr(entry, _INCOMPLETE_COLUMNS[kind]):
+        return FRESH
+    if age < SERVE_STALE_FOR:
+        return STALE
+    return EXPIRED
+
+
+def refresh_lock_key(steam_id, kind):
+    return f"snapshot-refresh:{kind}:{steam_id}"
+
+
+def share_page_key(slug):
+    return f"share-body:{slug}"
+
+
+def _sample_population(entry, context, now):
+    """Fold ``entry``'s user into the population sketches, once per user."""
+    db.session.flush()
+    claimed = db.session.execute(
+        db.update(WrappedShare)
+        .where(WrappedShare.id == entry.id, WrappedShare.sampled_at.is_(None))
+        .values(sampled_at=now)
+    ).rowcount
+
+    if claimed:
+        population.add_sample(population.sample(context))
+
+
+def save_snapshot(steam_id, kind, context, entry=None):
+    """Store ``context`` as the latest ``kind`` snapshot for ``steam_id``.
+
+    A context built while some upstreams were unavailable is marked
+    incomplete, and so served as stale until a rebuild succeeds. The first
+    complete dashboard is also sampled into app.utils.population.
+    """
+    entry = entry or get_share_entry(steam_id)
+    now = utcnow()
+
+    if entry is None:
+        user_id = (
+            db.session.query(User.id).filter_by(steam_id=steam_id).scalar_subquery()
+        )
+        entry = WrappedShare(
+            steam_id=steam_id, user_id=user_id, payload={}, is_public=False
+        )
+        db.session.add(entry)
+
+    if entry.payload_version != SNAPSHOT_VERSION:
+        # Whatever the other kind holds was written under an old shape. The
+        # Wrapped payload stays readable for its share link until rebuilt.
+        entry.generated_at = None
+        entry.dashboard_payload = None
+        entry.dashboard_generated_at = None
+        entry.payload_version = SNAPSHOT_VERSION
+
+    if kind == "wrapped":
+        entry.packed_payload = payloads.pack(context)
+        entry.payload = {}
+    else:
+        entry.dashboard_payload = context
+    setattr(entry, _GENERATED_COLUMNS[kind], now)
+    setattr(entry, _INCOMPLETE_COLUMNS[kind], bool(context.get("unavailable")))
+
+    sampled = entry.sampled_at is not None
+    if kind == "dashboard" and not sampled and not context.get("unavailable"):
+        _sample_population(entry, context, now)
+
+    db.session.commit()
+
+    if kind == "wrapped":
+        cache.delete(share_page_key(entry.slug))
+
+    return entry
+
+
+def _refresh(steam_id, kind, build):
+    try:
+        context = build(steam_id)
+        # An incomplete rebuild would replace a complete stale snapshot.
+        if context and not context.get("unavailable"):
+            save_snapshot(steam_id, kind, context)
+    except Exception as e:
+        # Nothing reads the future, so this is the only trace of the failure.
+        traceback.print_exc()
+        print(f"Snapshot refresh failed for {kind} {steam_id}: {e}")
+        db.session.rollback()
+    finally:
+        cache.delete(refresh_lock_key(steam_id, kind))
+
+
+def refresh_in_background(steam_id, kind, build):
+    """Rebuild a stale snapshot off the request thread, once per user."""
+    if cache.add(refresh_lock_key(steam_id, kind), True, timeout=REFRESH_LOCK_TIMEOUT):
+        submit(_refresh_executor, _refresh, steam_id, kind, build)
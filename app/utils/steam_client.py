@@ -1,54 +1,148 @@
-import requests
-from bs4 import BeautifulSoup
-from steam_web_api import Steam
+from html.parser import HTMLParser
 
 from app import cache
+from app.utils import http
+from app.utils.concurrency import gather
+from app.utils.profiling import traced
+from app.utils.upstream import UNAVAILABLE, memoize
 from flask import current_app
 
 
 steam_client = None
 
+BADGE_FETCH_WORKERS = 4
+
+# GetPlayerSummaries takes up to this many steamids per call.
+SUMMARY_BATCH_SIZE = 100
+# Summaries carry online state, so they are only reused briefly; the
+# per-steamid entries are shared by every user with that friend.
+SUMMARY_TIMEOUT = 300
+
+
+class PooledClient:
+    """Stands in for steam_web_api's client, sending its calls through the
+    shared transport."""
+
+    def __init__(self, key):
+        from steam_web_api.constants import API_BASE_URL
+        from steam_web_api.utils import buildUrlWithParams
+
+        self.key = key
+        self._base_url = API_BASE_URL
+        self._build_url = buildUrlWithParams
+
+    def request(self, method, url, data={}, params={}, headers={}):
+        request_url = self._build_url(self._base_url + url, self.key, params)
+        response = http.request(method, request_url)
+        response.raise_for_status()
+
+        return response.json()
+
+
+class SteamAPI:
+    def __init__(self, api_key):
+        # steam_web_api imports BeautifulSoup for its store client, so it is
+        # only loaded once a request needs Steam.
+        from steam_web_api.users import Users
+
+        self.users = Users(PooledClient(api_key))
+
 
 def get_steam_client():
     global steam_client
     if not steam_client:
         api_key = current_app.config["STEAM_API_KEY"]
         if api_key:
-            steam_client = Steam(api_key)
+            steam_client = SteamAPI(api_key)
     return steam_client
 
 
+def _refused(status_code):
+    """A 4xx other than 429: Steam has no data for us (private profile,
+    no stats...), as opposed to a call that failed."""
+    return 400 <= status_code < 500 and status_code != 429
+
+
+def _failure(e):
+    """What a Steam API getter returns after ``e``: None or UNAVAILABLE."""
+    response = getattr(e, "response", None)
+    if response is not None and _refused(response.status_code):
+        return None
+    return UNAVAILABLE
+
+
 def safe_get_json(url):
+    """GET ``url`` as JSON; None for a refused call, UNAVAILABLE for a failed one."""
     try:
-        r = requests.get(url, timeout=10)
-        r.raise_for_status()
+        r = http.get(url)
 
+        if _refused(r.status_code):
+            return None
+
+        r.raise_for_status()
         return r.json()
 
     except Exception as e:
         print(f"Failed to get JSON from {url}: {e}")
-        return None
+        return UNAVAILABLE
+
+
+class BadgeInfoParser(HTMLParser):
+    """Pulls the badge title and icon out of a badge page as it streams in."""
+
+    def __init__(self):
+        super().__init__()
+        self.name = None
+        self.image = None
+        self._title_parts = None
+
+    @property
+    def done(self):
+        return self.name is not None and self.image is not None
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        classes = (attrs.get("class") or "").split()
+
+        if tag == "div" and "badge_info_title" in classes and self.name is None:
+            self._title_parts = []
+        elif tag == "img" and "badge_icon" in classes and self.image is None:
+            self.image = attrs.get("src")
 
+    def handle_data(self, data):
+        if self._title_parts is not None:
+            self._title_parts.append(data)
 
-@cache.memoize(timeout=86400)
-def get_badge_info(badgeid, steamid):
+    def handle_endtag(self, tag):
+        if tag == "div" and self._title_parts is not None:
+            self.name = "".join(self._title_parts).strip()
+            self._title_parts = None
+
+
+# Badge metadata depends on the badge and level, not on who owns it; the
+# profile is only needed to build a URL that resolves.
+@memoize(timeout=86400 * 7, args_to_ignore=["steamid"])
+def get_badge_info(badgeid, steamid, appid=None, level=None):
     badge_page = f"https://steamcommunity.com/profiles/{steamid}/badges/{badgeid}"
+    parser = BadgeInfoParser()
 
     try:
-        html = requests.get(badge_page).text
-        soup = BeautifulSoup(html, "html.parser")
-        name_tag = soup.find("div", class_="badge_info_title")
-        badge_name = name_tag.text.strip() if name_tag else f"Badge {badgeid}"
-        img_tag = soup.find("img", class_="badge_icon")
-        badge_img = img_tag["src"] if img_tag else None
+        with http.get(badge_page, stream=True) as response:
+            response.raise_for_status()
+            response.encoding = response.encoding or "utf-8"
 
-        return {"name": badge_name, "image": badge_img}
+            for chunk in response.iter_content(chunk_size=16384, decode_unicode=True):
+                parser.feed(chunk)
+                if parser.done:
+                    break
+
+        return {"name": parser.name or f"Badge {badgeid}", "image": parser.image}
 
     except Exception:
-        return {"name": f"Badge {badgeid}", "image": None}
+        return UNAVAILABLE
 
 
-@cache.memoize(timeout=3600)
+@memoize(timeout=3600)
 def get_user_summary(steam_id):
     client = get_steam_client()
 
@@ -61,10 +155,70 @@ def get_user_summary(steam_id):
 
     except Exception as e:
         print(f"Error getting user summary: {e}")
-        return None
+        return _failure(e)
 
 
-@cache.memoize(timeout=3600)
+def _summary_key(steam_id):
+    return f"player-summary:{steam_id}"
+
+
+def _fetch_summaries(steam_ids):
+    client = get_steam_client()
+
+    if not client:
+        return []
+
+    try:
+        details = client.users.get_user_details(",".join(steam_ids), single=False)
+        return details["players"]
+
+    except Exception as e:
+        print(f"Error getting user summaries: {e}")
+        return []
+
+
+@traced()
+def get_user_summaries(steam_ids):
+    """Return ``{steamid: summary}`` for ``steam_ids``.
+
+    Cached summaries are read in one ``get_many``; the rest are fetched
+    concurrently, SUMMARY_BATCH_SIZE ids per call. Ids Steam returns nothing
+    for, or whose batch failed, are left out.
+    """
+    steam_ids = list(dict.fromkeys(steam_ids))
+    if not steam_ids:
+        return {}
+
+    cached = cache.get_many(*[_summary_key(steam_id) for steam_id in steam_ids])
+    summaries = {
+        steam_id: summary
+        for steam_id, summary in zip(steam_ids, cached)
+        if summary is not None
+    }
+
+    missing = [steam_id for steam_id in steam_ids if steam_id not in summaries]
+    batches = gather(
+        {
+            start: (_fetch_summaries, missing[start : start + SUMMARY_BATCH_SIZE])
+            for start in range(0, len(missing), SUMMARY_BATCH_SIZE)
+        }
+    )
+
+    fetched = {
+        player["steamid"]: player for players in batches.values() for player in players
+    }
+    if fetched:
+        cache.set_many(
+            {_summary_key(steam_id): player for steam_id, player in fetched.items()},
+            timeout=SUMMARY_TIMEOUT,
+        )
+
+    summaries.update(fetched)
+    return summaries
+
+
+# Only the ids: names, avatars and online state come from get_user_summaries.
+@memoize(timeout=3600)
 def get_friends_list(steam_id):
     client = get_steam_client()
 
@@ -72,7 +226,7 @@ def get_friends_list(steam_id):
         return None
 
     try:
-        friends = client.users.get_user_friends_list(steam_id)
+        friends = client.users.get_user_friends_list(steam_id, enriched=False)
         return {
             "friend_count": len(friends.get("friends", [])),
             "friends": friends.get("friends", []),
@@ -80,10 +234,10 @@ def get_friends_list(steam_id):
 
     except Exception as e:
         print(f"Error getting friends list: {e}")
-        return None
+        return _failure(e)
 
 
-@cache.memoize(timeout=3600)
+@memoize(timeout=3600)
 def get_owned_games(steam_id):
     client = get_steam_client()
     if not client:
@@ -95,10 +249,10 @@ def get_owned_games(steam_id):
 
     except Exception as e:
         print(f"Error getting owned games: {e}")
-        return None
+        return _failure(e)
 
 
-@cache.memoize(timeout=3600)
+@memoize(timeout=3600)
 def get_recent_games(steam_id):
     client = get_steam_client()
 
@@ -111,11 +265,13 @@ def get_recent_games(steam_id):
 
     except Exception as e:
         print(f"Error getting recent games: {e}")
-        return None
+        return _failure(e)
 
 
-@cache.memoize(timeout=86400)
+@memoize(timeout=86400)
 def get_badges(steam_id):
+    """The player's first badges from GetBadges; describe_badges adds their
+    names and icons."""
     client = get_steam_client()
 
     if not client:
@@ -123,25 +279,52 @@ def get_badges(steam_id):
 
     try:
         badges_resp = client.users.get_user_badges(steam_id)
-        badges = badges_resp.get("badges", [])
+        return badges_resp.get("badges", [])[:10]
 
-        processed_badges = []
+    except Exception as e:
+        print(f"Error getting badges: {e}")
+        return _failure(e)
 
-        for badge in badges[:10]:
-            badge_id = badge.get("badgeid")
-            badge_info = get_badge_info(badge_id, steam_id)
-            badge["name"] = badge_info.get("name")
-            badge["image"] = badge_info.get("image")
-            processed_badges.append(badge)
 
-        return processed_badges
+@traced()
+def describe_badges(steam_id, badges):
+    """``(badges, complete)``: ``badges`` with the name and icon from each
+    badge's page.
 
-    except Exception as e:
-        print(f"Error getting badges: {e}")
-        return None
+    Each page is scraped (and cached) separately by get_badge_info, so a
+    page that could not be fetched only costs its own badge a placeholder
+    and is retried soon; ``complete`` is False when that happened.
+    """
+    badge_infos = gather(
+        {
+            index: (
+                get_badge_info,
+                badge.get("badgeid"),
+                steam_id,
+                badge.get("appid"),
+                badge.get("level"),
+            )
+            for index, badge in enumerate(badges)
+        },
+        max_workers=BADGE_FETCH_WORKERS,
+    )
+
+    described = []
+    for index, badge in enumerate(badges):
+        badge_info = badge_infos[index] or {}
+        described.append(
+            dict(
+                badge,
+                name=badge_info.get("name", f"Badge {badge.get('badgeid')}"),
+                image=badge_info.get("image"),
+            )
+        )
 
+    complete = all(info is not UNAVAILABLE for info in badge_infos.values())
+    return described, complete
 
-@cache.memoize(timeout=3600)
+
+@memoize(timeout=3600)
 def get_steam_level(steam_id):
     client = get_steam_client()
 
@@ -154,91 +337,125 @@ def get_steam_level(steam_id):
 
     except Exception as e:
         print(f"Error getting Steam level: {e}")
-        return None
+        return _failure(e)
 
 
-@cache.memoize(timeout=86400 * 7)  # Cache for a week
+# Not memoized: results are persisted compactly by app.utils.metadata_store.
+@traced()
 def get_game_details(appid):
+    """Store details merged with SteamSpy's genre, tags and owner estimate.
+
+    None when the store has no data for ``appid``, UNAVAILABLE when the store
+    could not be reached. If only SteamSpy fails the store data is returned
+    with ``spy_unavailable`` set.
+    """
     details_url = f"https://store.steampowered.com/api/appdetails?appids={appid}&l=en"
     spy_data_url = f"https://steamspy.com/api.php?request=appdetails&appid={appid}"
 
     try:
-        details_response = requests.get(details_url).json()
+        response = http.get(details_url)
+        response.raise_for_status()
+        details = response.json()
 
-        try:
-            spy_data_response = requests.get(spy_data_url, timeout=5).json()
-            genre = spy_data_response.get("genre", "")
-            owners = spy_data_response.get("owners")
-            tags = spy_data_response.get("tags", {})
+    except Exception as e:
+        print(f"Error fetching store info for {appid}: {e}")
+        return UNAVAILABLE
 
-        except Exception:
-            genre = ""
-            owners = ""
-            tags = {}
+    data = (details or {}).get(str(appid), {}).get("data")
+    if data is None:
+        return None
 
-        data = details_response.get(str(appid), {}).get("data")
-        if data is None:
-            return None
+    try:
+        response = http.get(spy_data_url, timeout=(3.05, 5))
+        response.raise_for_status()
+        spy_data = response.json()
+        data["genre"] = spy_data.get("genre", "")
+        data["tags"] = spy_data.get("tags", {})
+        if spy_data.get("owners"):
+            data["owners"] = spy_data["owners"]
 
-        data["genre"] = genre
-        data["tags"] = tags
-        if owners:
-            data["owners"] = owners
+    except Exception:
+        data["genre"] = ""
+        data["tags"] = {}
+        data["spy_unavailable"] = True
 
-        return data
-    except Exception as e:
-        print(f"Error fetching store info for {appid}: {e}")
-        return None
+    return data
 
 
-@cache.memoize(timeout=86400)
-def get_game_achievements(steam_id, appid):
-    api_key = current_app.config["STEAM_API_KEY"]
-    url_player = (
-        f"https://api.steampowered.com/ISteamUserStats/GetPlayerAchievements/v1/"
-        f"?appid={appid}&key={api_key}&steamid={steam_id}"
+@memoize(timeout=86400)
+def get_global_achievement_rarity(appid):
+    url_rarity = (
+        f"https://api.steampowered.com/ISteamUserStats/GetGlobalAchievementPercentagesForApp/v2/"
+        f"?gameid={appid}"
     )
 
-    player_raw = safe_get_json(url_player)
+    rarity_raw = safe_get_json(url_rarity)
+    if rarity_raw is UNAVAILABLE:
+        return UNAVAILABLE
 
-    if not player_raw or "playerstats" not in player_raw:
-        return []
+    return (
+        {
+            a["name"]: a["percent"]
+            for a in rarity_raw.get("achievementpercentages", {}).get(
+                "achievements", []
+            )
+        }
+        if rarity_raw
+        else {}
+    )
 
-    if not player_raw["playerstats"].get("success", True):
-        return []
-
-    player_achs = player_raw["playerstats"].get("achievements", [])
-    player_map = {a["apiname"]: a for a in player_achs}
 
+@memoize(timeout=86400 * 7)
+def get_achievement_schema(appid):
+    api_key = current_app.config["STEAM_API_KEY"]
     url_schema = (
         f"https://api.steampowered.com/ISteamUserStats/GetSchemaForGame/v2/"
         f"?key={api_key}&appid={appid}"
     )
 
     schema_raw = safe_get_json(url_schema)
-    schema_achs = (
+    if schema_raw is UNAVAILABLE:
+        return UNAVAILABLE
+
+    return (
         schema_raw.get("game", {}).get("availableGameStats", {}).get("achievements", [])
         if schema_raw
         else []
     )
 
-    url_rarity = (
-        f"https://api.steampowered.com/ISteamUserStats/GetGlobalAchievementPercentagesForApp/v2/"
-        f"?gameid={appid}"
-    )
 
-    rarity_raw = safe_get_json(url_rarity)
-    global_rarity = (
-        {
-            a["name"]: a["percent"]
-            for a in rarity_raw.get("achievementpercentages", {}).get(
-                "achievements", []
-            )
-        }
-        if rarity_raw
-        else {}
+# None (no stats or a private profile) is cached too, as the merged empty
+# list used to be; a failed call is UNAVAILABLE and only cached briefly.
+@memoize(timeout=86400, cache_none=True)
+def get_player_achievements(steam_id, appid):
+    api_key = current_app.config["STEAM_API_KEY"]
+    url_player = (
+        f"https://api.steampowered.com/ISteamUserStats/GetPlayerAchievements/v1/"
+        f"?appid={appid}&key={api_key}&steamid={steam_id}"
     )
 
+    player_raw = safe_get_json(url_player)
+    if player_raw is UNAVAILABLE:
+        return UNAVAILABLE
+
+    if not player_raw or "playerstats" not in player_raw:
+        return None
+
+    if not player_raw["playerstats"].get("success", True):
+        return None
+
+    player_achs = player_raw["playerstats"].get("achievements", [])
+    return {a["apiname"]: a for a in player_achs}
+
+
+def merge_achievements(schema_achs, player_map, global_rarity):
+    """Combine the per-app schema and rarity with one player's unlock state."""
+    if player_map is None or UNAVAILABLE in (schema_achs, player_map):
+        return []
+
+    if global_rarity is UNAVAILABLE:
+        global_rarity = {}
+
     final = []
     for ach in schema_achs:
         apiname = ach["name"]
@@ -0,0 +1,57 @@
+from functools import wraps
+
+from app import cache
+from app.utils.profiling import traced_memoize
+
+# Failed upstream calls are remembered this long, successes for their own
+# (much longer) memoize timeout.
+NEGATIVE_TIMEOUT = 60
+
+
+class _Unavailable:
+    """Returned when an upstream call failed, as opposed to ``None`` for
+    "the upstream has no data". Falsy, so empty-result checks still apply."""
+
+    __slots__ = ()
+
+    def __bool__(self):
+        return False
+
+    def __repr__(self):
+        return "UNAVAILABLE"
+
+    def __reduce__(self):
+        # Unpickles (e.g. out of the cache) to the same object, so callers
+        # can keep testing ``value is UNAVAILABLE``.
+        return "UNAVAILABLE"
+
+
+UNAVAILABLE = _Unavailable()
+
+
+def memoize(timeout=None, negative_timeout=NEGATIVE_TIMEOUT, **kwargs):
+    """``traced_memoize`` for upstream fetches that return UNAVAILABLE on failure.
+
+    UNAVAILABLE is cached under the same key as a success, but only for
+    ``negative_timeout`` seconds, so an outage is retried soon without
+    every request repeating the failing call.
+    """
+
+    def decorator(fn):
+        @wraps(fn)
+        def fetch(*args, **kw):
+            result = fn(*args, **kw)
+
+            if result is UNAVAILABLE:
+                key = memoized.make_cache_key(memoized.uncached, *args, **kw)
+                cache.set(key, UNAVAILABLE, timeout=negative_timeout)
+
+            return result
+
+        memoized = traced_memoize(
+            timeout, response_filter=lambda rv: rv is not UNAVAILABLE, **kwargs
+        )(fetch)
+
+        return memoized
+
+    return decorator
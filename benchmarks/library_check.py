@@ -0,0 +1,106 @@
+"""Check GameLibrary against the per-game scans it replaced in Analytics.
+
+Builds randomized owned-games lists (ties, missing keys, never-played and
+never-launched games) and compares every aggregate, the top-N selection and
+the monthly timeline with the original implementations:
+
+    python -m benchmarks.library_check --runs 200 --seed 1
+"""
+
+import argparse
+import random
+import sys
+from collections import defaultdict
+from datetime import datetime
+
+from app.utils.library import GameLibrary
+
+SIZES = (0, 1, 2, 10, 100, 1000, 20000)
+
+
+def reference(games, limit):
+    """The aggregates as Analytics computed them before GameLibrary."""
+    playtime = [g.get("playtime_forever", 0) for g in games]
+
+    timeline = defaultdict(int)
+    for game in games:
+        last_played = game.get("rtime_last_played", 0)
+        if last_played > 0:
+            key = datetime.fromtimestamp(last_played).strftime("%Y-%m")
+            timeline[key] += game.get("playtime_forever", 0) / 60
+
+    return {
+        "total_playtime_minutes": sum(playtime),
+        "never_played": len([m for m in playtime if m == 0]),
+        "played": len([m for m in playtime if m > 0]),
+        "pile_of_shame": len([m for m in playtime if m < 60]),
+        "completed": len([m for m in playtime if m > 600]),
+        "over_an_hour": len([m for m in playtime if 60 < m <= 600]),
+        "abandoned": len([m for m in playtime if 0 < m <= 60]),
+        "top": sorted(games, key=lambda x: x.get("playtime_forever", 0), reverse=True)[
+            :limit
+        ],
+        "timeline": dict(timeline),
+    }
+
+
+def current(games, limit):
+    library = GameLibrary(games)
+
+    return {
+        "total_playtime_minutes": library.total_playtime_minutes,
+        "never_played": library.never_played,
+        "played": library.played,
+        "pile_of_shame": library.under_an_hour,
+        "completed": library.over_ten_hours,
+        "over_an_hour": library.over_an_hour,
+        "abandoned": library.barely_played,
+        "top": library.top(limit),
+        "timeline": dict(library.monthly_hours()),
+    }
+
+
+def random_game(rng, appid):
+    game = {"appid": appid}
+
+    # Few distinct values near the category thresholds, so ties are common.
+    playtime = rng.choice(
+        [0, 0, 1, 59, 60, 61, 600, 601, rng.randint(0, 100000), rng.randint(0, 900)]
+    )
+    if rng.random() > 0.05:
+        game["playtime_forever"] = playtime
+
+    if rng.random() > 0.05:
+        game["rtime_last_played"] = rng.choice(
+            [0, rng.randint(1_300_000_000, 1_760_000_000)]
+        )
+
+    return game
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    mismatches = 0
+
+    for run in range(args.runs):
+        size = SIZES[run % len(SIZES)]
+        games = [random_game(rng, appid) for appid in range(size)]
+        limit = rng.choice([1, 5, 10, 50])
+
+        expected, actual = reference(games, limit), current(games, limit)
+        for name in expected:
+            if expected[name] != actual[name]:
+                mismatches += 1
+                print(f"run {run} ({size} games): {name} differs", file=sys.stderr)
+
+    print(f"{args.runs} libraries checked, {mismatches} mismatch(es)", file=sys.stderr)
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,241 @@
+"""Upstream responses for the stub server, scaled up from the samples in fixtures/.
+
+Every response is derived deterministically from the steamid or appid in
+the request, so two runs against the same library size see identical data.
+The library size is encoded in the steamid (see ``steam_id_for``).
+"""
+
+import json
+import random
+from functools import lru_cache
+from pathlib import Path
+from urllib.parse import parse_qs
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+BASE_STEAM_ID = 76561198000000000
+# rtime_last_played values are spread over the three years before this.
+NOW = 1727654400
+FRIEND_COUNT = 60
+BADGE_COUNT = 24
+ACHIEVEMENTS_PER_GAME = 40
+RECENT_GAMES = 8
+
+
+def steam_id_for(size):
+    return str(BASE_STEAM_ID + size)
+
+
+def library_size(steam_id):
+    return max(0, int(steam_id) - BASE_STEAM_ID)
+
+
+@lru_cache(maxsize=None)
+def _sample(name):
+    path = FIXTURES / name
+    if path.suffix == ".json":
+        return json.loads(path.read_text())
+    return path.read_text()
+
+
+def _sample_copy(name):
+    return dict(_sample(name))
+
+
+def _player(steam_id):
+    player = _sample_copy("player_summary.json")
+    player["steamid"] = steam_id
+    player["personaname"] = f"Player {steam_id[-6:]}"
+    return player
+
+
+@lru_cache(maxsize=8)
+def _owned_games(size):
+    rng = random.Random(size)
+    games = []
+
+    for index in range(size):
+        game = _sample_copy("owned_game.json")
+        game["appid"] = 10 * (index + 1)
+        game["name"] = f"Game {index + 1}"
+
+        # A third of a typical library is never launched; the rest follows
+        # a long tail, with a few games taking hundreds of hours.
+        if rng.random() < 0.33:
+            game["playtime_forever"] = 0
+            game["rtime_last_played"] = 0
+        else:
+            game["playtime_forever"] = int(rng.paretovariate(1.2) * 30)
+            game["rtime_last_played"] = NOW - rng.randrange(86400 * 365 * 3)
+
+        game["playtime_windows_forever"] = game["playtime_forever"]
+        game["playtime_linux_forever"] = 0
+        games.append(game)
+
+    return json.dumps({"response": {"game_count": size, "games": games}})
+
+
+def _recent_games(size):
+    games = []
+
+    for index in range(min(size, RECENT_GAMES)):
+        game = _sample_copy("recent_game.json")
+        game["appid"] = 10 * (index + 1)
+        game["name"] = f"Game {index + 1}"
+        games.append(game)
+
+    return {"response": {"total_count": len(games), "games": games}}
+
+
+def _friends(steam_id):
+    friends = []
+
+    for index in range(FRIEND_COUNT):
+        friend = _sample_copy("friend.json")
+        friend["steamid"] = str(int(steam_id) + 10**9 + index)
+        friends.append(friend)
+
+    return {"friendslist": {"friends": friends}}
+
+
+def _badges():
+    badges = []
+
+    for index in range(BADGE_COUNT):
+        badge = _sample_copy("badge.json")
+        badge["badgeid"] = index + 1
+        badge["level"] = index % 5 + 1
+        badges.append(badge)
+
+    return {
+        "response": {
+            "badges": badges,
+            "player_xp": 12345,
+            "player_level": 42,
+            "player_xp_needed_to_level_up": 155,
+            "player_xp_needed_current_level": 12300,
+        }
+    }
+
+
+def _appdetails(appid):
+    data = dict(_sample("appdetails.json"))
+    data["steam_appid"] = appid
+    data["name"] = f"Game {appid // 10}"
+    data["developers"] = [f"Studio {appid % 7}"]
+    data["genres"] = [
+        {"id": str(appid % 5), "description": f"Genre {appid % 5}"},
+        {"id": "37", "description": "Free To Play"},
+    ]
+    return {str(appid): {"success": True, "data": data}}
+
+
+def _steamspy(appid):
+    data = _sample_copy("steamspy.json")
+    data["appid"] = appid
+    data["name"] = f"Game {appid // 10}"
+    return data
+
+
+def _achievement_names(appid):
+    return [f"ACH_{appid}_{index}" for index in range(ACHIEVEMENTS_PER_GAME)]
+
+
+def _schema(appid):
+    achievements = []
+
+    for name in _achievement_names(appid):
+        achievement = _sample_copy("schema_achievement.json")
+        achievement["name"] = name
+        achievement["displayName"] = name.title()
+        achievements.append(achievement)
+
+    return {
+        "game": {
+            "gameName": f"Game {appid // 10}",
+            "availableGameStats": {"achievements": achievements},
+        }
+    }
+
+
+def _global_rarity(appid):
+    rng = random.Random(appid)
+    achievements = []
+
+    for name in _achievement_names(appid):
+        achievement = _sample_copy("global_achievement.json")
+        achievement["name"] = name
+        achievement["percent"] = f"{rng.uniform(0.1, 90):.1f}"
+        achievements.append(achievement)
+
+    return {"achievementpercentages": {"achievements": achievements}}
+
+
+def _player_achievements(steam_id, appid):
+    rng = random.Random(int(steam_id) ^ appid)
+    achievements = []
+
+    for name in _achievement_names(appid):
+        achievement = _sample_copy("player_achievement.json")
+        achievement["apiname"] = name
+        achievement["achieved"] = int(rng.random() < 0.4)
+        achievements.append(achievement)
+
+    return {
+        "playerstats": {
+            "steamID": steam_id,
+            "gameName": f"Game {appid // 10}",
+            "achievements": achievements,
+            "success": True,
+        }
+    }
+
+
+def _badge_page():
+    return _sample("badge_page.html")
+
+
+def _json(body):
+    if not isinstance(body, str):
+        body = json.dumps(body)
+    return 200, "application/json", body.encode("utf-8")
+
+
+def respond(host, path, query):
+    """Return ``(status, content_type, body)`` for a request to ``host``."""
+    params = {key: values[0] for key, values in parse_qs(query).items()}
+
+    if host == "api.steampowered.com":
+        if path.startswith("/ISteamUser/GetPlayerSummaries/"):
+            players = [_player(s) for s in params["steamids"].split(",")]
+            return _json({"response": {"players": players}})
+        if path.startswith("/ISteamUser/GetFriendList/"):
+            return _json(_friends(params["steamid"]))
+        if path.startswith("/IPlayerService/GetOwnedGames/"):
+            return _json(_owned_games(library_size(params["steamid"])))
+        if path.startswith("/IPlayerService/GetRecentlyPlayedGames/"):
+            return _json(_recent_games(library_size(params["steamid"])))
+        if path.startswith("/IPlayerService/GetBadges/"):
+            return _json(_badges())
+        if path.startswith("/IPlayerService/GetSteamLevel/"):
+            return _json({"response": {"player_level": 42}})
+        if path.startswith("/ISteamUserStats/GetSchemaForGame/"):
+            return _json(_schema(int(params["appid"])))
+        if path.startswith("/ISteamUserStats/GetGlobalAchievementPercentagesForApp/"):
+            return _json(_global_rarity(int(params["gameid"])))
+        if path.startswith("/ISteamUserStats/GetPlayerAchievements/"):
+            return _json(_player_achievements(params["steamid"], int(params["appid"])))
+
+    if host == "store.steampowered.com" and path == "/api/appdetails":
+        return _json(_appdetails(int(params["appids"])))
+
+    if host == "steamspy.com":
+        return _json(_steamspy(int(params["appid"])))
+
+    if host == "steamcommunity.com" and "/badges/" in path:
+        return 200, "text/html; charset=UTF-8", _badge_page().encode("utf-8")
+
+    if host == "generativelanguage.googleapis.com":
+        return _json(_sample("gemini.json"))
+
+    return 404, "application/json", b'{"error": "no fixture"}'
@@ -0,0 +1,332 @@
+"""End-to-end benchmarks for the Wrapped, dashboard and share paths.
+
+Every upstream (Steam Web API, store, SteamSpy, badge pages, Gemini) is
+served by the local stub server with a fixed injected latency, so results
+only move when the code does. Results are written as JSON and can be
+compared against an earlier run:
+
+    python -m benchmarks.run --sizes 10,1000,20000 --output after.json
+    python -m benchmarks.run --output after.json --compare before.json
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+from benchmarks import stub_server
+from benchmarks.responses import steam_id_for
+
+DEFAULT_SIZES = (10, 100, 1000, 5000, 20000)
+
+ANALYTICS_METHODS = (
+    "get_dashboard_stats",
+    "get_playtime_timeline",
+    "get_top_games",
+    "get_top_developers",
+    "get_genre_breakdown",
+    "get_gaming_energy_score",
+    "get_achievement_stats",
+    "get_achievement_score",
+    "get_global_comparison",
+    "get_sleep_destroyer",
+    "get_funny_analogies",
+    "get_games_categorized",
+    "get_badges",
+    "get_friends_panel",
+    "get_playstyle_personality",
+)
+
+GEMINI_URL = (
+    "https://generativelanguage.googleapis.com/v1beta/models/"
+    "gemini-2.0-flash:generateContent"
+)
+
+
+class StubPersonalityModel:
+    """Sends the personality prompt to the stub server instead of Gemini."""
+
+    def generate_content(self, prompt, request_options=None):
+        from app.utils import http
+
+        response = http.post(
+            GEMINI_URL, json={"contents": [{"parts": [{"text": prompt}]}]}
+        )
+        parts = response.json()["candidates"][0]["content"]["parts"]
+        return SimpleNamespace(text=parts[0]["text"])
+
+
+def _stats(samples):
+    return {
+        "median_ms": round(statistics.median(samples), 3),
+        "min_ms": round(min(samples), 3),
+        "max_ms": round(max(samples), 3),
+        "runs": len(samples),
+    }
+
+
+def _timed(fn, repeat, setup=None):
+    """Time ``fn(setup())`` ``repeat`` times; ``setup`` is not timed."""
+    samples = []
+
+    for _ in range(repeat):
+        state = setup() if setup else None
+        start = time.perf_counter()
+        fn(state)
+        samples.append((time.perf_counter() - start) * 1000)
+
+    return _stats(samples)
+
+
+def _get(client, path, expected=200, **kwargs):
+    response = client.get(path, **kwargs)
+    if response.status_code != expected:
+        raise RuntimeError(f"GET {path} returned {response.status_code}")
+    return response
+
+
+def _create_app(workdir):
+    from config import Config
+
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{workdir}/bench.db"
+        CACHE_DIR = os.path.join(workdir, "cache")
+        CACHE_THRESHOLD = 100000
+        STEAM_API_KEY = "bench"
+        GOOGLE_API_KEY = "bench"
+
+    from app import create_app, migrations
+    from app.utils import analytics
+
+    app = create_app(BenchConfig)
+    with app.app_context():
+        migrations.upgrade()
+    analytics._model = StubPersonalityModel()
+    logging.getLogger("app.utils.profiling").setLevel(logging.WARNING)
+
+    return app
+
+
+def bench_size(app, size, repeat):
+    from app import cache
+    from app.db import db
+    from app.models import GameMetadata, WrappedShare
+    from app.routes.views import build_dashboard_context, build_wrapped_context
+    from app.utils.analytics import Analytics
+    from app.utils.profile_loader import load_profile
+    from app.utils.snapshots import refresh_lock_key, save_snapshot, share_page_key
+
+    steam_id = steam_id_for(size)
+    results = {}
+
+    def reset(state=None):
+        cache.clear()
+        GameMetadata.query.delete()
+        WrappedShare.query.filter_by(steam_id=steam_id).delete()
+        db.session.commit()
+
+    def reset_shell(state=None):
+        reset()
+        # A cold /dashboard starts the full rebuild in the background; keep
+        # it from running alongside (and skewing) the requests being timed.
+        cache.set(refresh_lock_key(steam_id, "dashboard"), True)
+
+    with app.test_request_context():
+        results["build_wrapped_context.cold"] = _timed(
+            lambda _: build_wrapped_context(steam_id), repeat, setup=reset
+        )
+        results["build_wrapped_context.warm"] = _timed(
+            lambda _: build_wrapped_context(steam_id), repeat
+        )
+
+        # Method timings exclude upstream latency: fill every cache first.
+        profile = load_profile(steam_id, include_level=True)
+        warm = Analytics.from_profile(profile)
+        for method in ANALYTICS_METHODS:
+            getattr(warm, method)()
+
+        results["analytics.init"] = _timed(
+            lambda _: Analytics.from_profile(profile), repeat
+        )
+        for method in ANALYTICS_METHODS:
+            results[f"analytics.{method}"] = _timed(
+                lambda analytics: getattr(analytics, method)(),
+                repeat,
+                setup=lambda: Analytics.from_profile(profile),
+            )
+
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session["steam_id"] = steam_id
+
+    sections = (
+        "personality",
+        "achievements",
+        "developers",
+        "genres",
+        "badges",
+        "friends",
+    )
+
+    with app.app_context():
+        results["dashboard.shell_cold"] = _timed(
+            lambda _: _get(client, "/dashboard"), repeat, setup=reset_shell
+        )
+
+        def warm_shell():
+            reset_shell()
+            _get(client, "/dashboard")
+
+        results["dashboard.sections_cold"] = _timed(
+            lambda _: [_get(client, f"/dashboard/sections/{s}") for s in sections],
+            repeat,
+            setup=warm_shell,
+        )
+
+    with app.test_request_context():
+        entry = save_snapshot(steam_id, "dashboard", build_dashboard_context(steam_id))
+        entry = save_snapshot(
+            steam_id, "wrapped", build_wrapped_context(steam_id), entry
+        )
+        entry.is_public = True
+        db.session.commit()
+        slug = entry.slug
+
+    with app.app_context():
+        results["dashboard.snapshot"] = _timed(
+            lambda _: _get(client, "/dashboard"), repeat
+        )
+
+        share_path = f"/wrapped/shared/{slug}"
+        results["share.render"] = _timed(
+            lambda _: _get(client, share_path),
+            repeat,
+            setup=lambda: cache.delete(share_page_key(slug)),
+        )
+        results["share.cached"] = _timed(lambda _: _get(client, share_path), repeat)
+
+        etag = _get(client, share_path).headers["ETag"]
+        results["share.not_modified"] = _timed(
+            lambda _: _get(
+                client, share_path, expected=304, headers={"If-None-Match": etag}
+            ),
+            repeat,
+        )
+
+    return results
+
+
+def _git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current, baseline, threshold, min_delta_ms):
+    """Print median changes against ``baseline``; return the regressions."""
+    regressions = []
+
+    for size, scenarios in current["results"].items():
+        for name, stats in scenarios.items():
+            before = baseline.get("results", {}).get(size, {}).get(name)
+            if not before:
+                continue
+
+            old, new = before["median_ms"], stats["median_ms"]
+            change = (new - old) / old if old else 0.0
+            flag = ""
+            if change > threshold and new - old > min_delta_ms:
+                flag = "  REGRESSION"
+                regressions.append((size, name))
+
+            print(
+                f"{size:>6} {name:<40} {old:>10.2f} -> {new:>10.2f} ms"
+                f" ({change:+.0%}){flag}"
+            )
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--sizes",
+        default=",".join(str(size) for size in DEFAULT_SIZES),
+        help="comma-separated library sizes",
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--latency", type=float, default=0.02, help="seconds per upstream call"
+    )
+    parser.add_argument("--host-latency", action="append", metavar="HOST=SECONDS")
+    parser.add_argument("--output", default="benchmark-results.json")
+    parser.add_argument("--compare", metavar="BASELINE", help="earlier results file")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.25,
+        help="relative median slowdown reported as a regression",
+    )
+    parser.add_argument("--min-delta-ms", type=float, default=1.0)
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+    host_latency = stub_server.parse_host_latency(args.host_latency)
+    server = stub_server.start(args.latency, host_latency)
+
+    workdir = tempfile.mkdtemp(prefix="steam-wrapped-bench-")
+    os.environ["UPSTREAM_OVERRIDE"] = server.url
+    # Repeated cold runs would otherwise measure the rate limiter's queue.
+    os.environ["RATE_LIMIT_ENABLED"] = "0"
+    app = _create_app(workdir)
+
+    results = {}
+    for size in sizes:
+        print(f"Library of {size} games...", file=sys.stderr)
+        results[str(size)] = bench_size(app, size, args.repeat)
+
+    report = {
+        "meta": {
+            "revision": _git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "latency": args.latency,
+            "host_latency": host_latency,
+            "repeat": args.repeat,
+            "sizes": sizes,
+        },
+        "results": results,
+    }
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+    print(f"Wrote {args.output}", file=sys.stderr)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+        regressions = compare(report, baseline, args.threshold, args.min_delta_ms)
+        if regressions:
+            print(f"{len(regressions)} regression(s)", file=sys.stderr)
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
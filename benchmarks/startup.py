@@ -0,0 +1,98 @@
+"""Cold-start benchmark: how long a fresh worker takes to import the app.
+
+Each run starts a new interpreter, so nothing is shared between runs, and
+times ``import run``, which is what ``gunicorn run:application`` does. It
+also reports which of the heavy optional modules a worker loads at startup:
+
+    python -m benchmarks.startup --output startup.json
+    python -m benchmarks.startup --output after.json --compare startup.json
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from benchmarks.run import _git_revision, _stats, compare
+
+# Only needed once a request calls Gemini or Steam.
+HEAVY_MODULES = ("google.generativeai", "steam_web_api", "bs4")
+
+CHILD = """
+import json, sys, time
+start = time.perf_counter()
+import run
+print(json.dumps({
+    "import_ms": (time.perf_counter() - start) * 1000,
+    "loaded": [m for m in sys.argv[1].split(",") if m in sys.modules],
+}))
+"""
+
+
+def measure():
+    workdir = tempfile.mkdtemp(prefix="steam-wrapped-startup-")
+    env = dict(
+        os.environ,
+        DATABASE_URL=f"sqlite:///{workdir}/startup.db",
+        STEAM_API_KEY=os.environ.get("STEAM_API_KEY", "bench"),
+        GOOGLE_API_KEY=os.environ.get("GOOGLE_API_KEY", "bench"),
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", CHILD, ",".join(HEAVY_MODULES)],
+        capture_output=True,
+        text=True,
+        check=True,
+        env=env,
+    ).stdout
+
+    return json.loads(output.splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--output", default="startup-results.json")
+    parser.add_argument("--compare", metavar="BASELINE", help="earlier results file")
+    parser.add_argument("--threshold", type=float, default=0.25)
+    parser.add_argument("--min-delta-ms", type=float, default=20.0)
+    args = parser.parse_args()
+
+    # The first interpreter also fills the bytecode caches; don't count it.
+    measure()
+    runs = [measure() for _ in range(args.repeat)]
+    results = {"import_run": _stats([run["import_ms"] for run in runs])}
+
+    report = {
+        "meta": {
+            "revision": _git_revision(),
+            "python": sys.version.split()[0],
+            "repeat": args.repeat,
+            "loaded_at_startup": runs[-1]["loaded"],
+        },
+        "results": {"startup": results},
+    }
+
+    for name, stats in results.items():
+        print(f"{name:<20} {stats['median_ms']:>10.2f} ms median", file=sys.stderr)
+    print(f"Heavy modules loaded: {runs[-1]['loaded'] or 'none'}", file=sys.stderr)
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+    print(f"Wrote {args.output}", file=sys.stderr)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+        regressions = compare(report, baseline, args.threshold, args.min_delta_ms)
+        if regressions:
+            print(f"{len(regressions)} regression(s)", file=sys.stderr)
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
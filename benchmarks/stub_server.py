@@ -0,0 +1,102 @@
+"""Local stand-in for every upstream the app talks to.
+
+Requests arrive as ``/<original host>/<path>?<query>`` (see
+``UPSTREAM_OVERRIDE`` in app/utils/http.py) and are answered from
+``benchmarks.responses`` after a fixed, per-host configurable delay.
+
+Run it on its own to point a development server at it:
+
+    python -m benchmarks.stub_server --port 8001 --latency 0.05
+    UPSTREAM_OVERRIDE=http://127.0.0.1:8001 flask --app run run
+"""
+
+import argparse
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+from benchmarks.responses import respond
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def _handle(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            self.rfile.read(length)
+
+        parts = urlsplit(self.path)
+        _, host, path = parts.path.split("/", 2)
+        path = "/" + path
+
+        time.sleep(self.server.latency_for(host))
+        status, content_type, body = respond(host, path, parts.query)
+
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = _handle
+    do_POST = _handle
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, latency=0.0, host_latency=None):
+        super().__init__(address, StubHandler)
+        self.latency = latency
+        self.host_latency = host_latency or {}
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def latency_for(self, host):
+        return self.host_latency.get(host, self.latency)
+
+
+def start(latency=0.0, host_latency=None, port=0):
+    """Serve on a background thread and return the running ``StubServer``."""
+    server = StubServer(("127.0.0.1", port), latency, host_latency)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def parse_host_latency(values):
+    """Turn ``["steamspy.com=0.4", ...]`` into ``{"steamspy.com": 0.4}``."""
+    host_latency = {}
+
+    for value in values or []:
+        host, _, seconds = value.partition("=")
+        host_latency[host] = float(seconds)
+
+    return host_latency
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--host-latency", action="append", metavar="HOST=SECONDS")
+    args = parser.parse_args()
+
+    server = StubServer(
+        ("127.0.0.1", args.port),
+        args.latency,
+        parse_host_latency(args.host_latency),
+    )
+    print(f"Stub upstream listening on {server.url}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
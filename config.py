@@ -15,9 +15,41 @@ class Config:
         os.environ.get("DATABASE_URL") or "sqlite:///steam_wrapped.db"
     )
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Per gunicorn worker: request threads plus the background fetch and
+    # snapshot pools share this pool. Pre-ping replaces connections the
+    # server closed while idle instead of failing the next request on them.
+    SQLALCHEMY_ENGINE_OPTIONS = (
+        {}
+        if SQLALCHEMY_DATABASE_URI.startswith("sqlite")
+        else {
+            "pool_size": int(os.environ.get("DB_POOL_SIZE", 5)),
+            "max_overflow": int(os.environ.get("DB_MAX_OVERFLOW", 5)),
+            "pool_timeout": 10,
+            "pool_recycle": 1800,
+            "pool_pre_ping": True,
+        }
+    )
 
-    CACHE_TYPE = "FileSystemCache"
+    # Each worker keeps a small LRU in front of a cache shared by every
+    # worker: Redis when REDIS_URL is set, the local filesystem otherwise.
+    CACHE_TYPE = "app.utils.cache_backends.TieredCache"
+    CACHE_REDIS_URL = os.environ.get("REDIS_URL")
+    CACHE_SHARED_TYPE = "RedisCache" if CACHE_REDIS_URL else "FileSystemCache"
+    CACHE_KEY_PREFIX = "steam-wrapped:"
     CACHE_DIR = os.path.join(os.path.dirname(__file__), "app/cache")
+    CACHE_THRESHOLD = int(os.environ.get("CACHE_THRESHOLD", 5000))
+    CACHE_LOCAL_MAX_ENTRIES = int(os.environ.get("CACHE_LOCAL_MAX_ENTRIES", 1024))
+    CACHE_LOCAL_MAX_BYTES = int(os.environ.get("CACHE_LOCAL_MAX_MB", 64)) * 1024 * 1024
+    CACHE_LOCAL_TIMEOUT = 60
+    CACHE_SHARED_ONLY_PREFIXES = ("wrapped-job:",)
     CACHE_DEFAULT_TIMEOUT = 3600
 
     SESSION_TYPE = "filesystem"
+
+    # Server-Timing headers and /metrics expose per-call timings and cache
+    # outcomes, so they are only served when explicitly enabled.
+    PROFILING_ENABLED = os.environ.get("PROFILING_ENABLED", "").lower() in (
+        "1",
+        "true",
+        "yes",
+    )
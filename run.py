@@ -4,6 +4,11 @@ import os
 app = create_app()
 
 if __name__ == "__main__":
+    from app import migrations
+
+    with app.app_context():
+        migrations.upgrade()
+
     app.run(debug=True, host="0.0.0.0", port=int(os.environ.get("PORT", 5000)))
 
 